@@ -0,0 +1,288 @@
+"""Solves many blocks world or sliding puzzle instances on all the cores, with a process pool.
+
+The instances are read from a file that holds several instances separated by lines of "=====",
+or from a directory (every file in it, in name order, with one or more instances each). They are
+streamed: only a few instances per worker are read ahead, so the input can be arbitrarily large.
+
+Every instance gets a timeout and every worker a memory cap. A result is written as soon as it is ready
+(so in completion order, not input order), as a JSON line:
+    {"instance": "blocks.txt#0", "status": "solved", "cost": 4, "length": 4, "expansions": 12,
+     "seconds": 0.01, "path": [...]}
+where status is one of solved, no_solution, timeout, memory, error, crashed.
+
+A worker that dies (killed by a signal, the OOM killer or a crash of the interpreter) breaks the whole pool, so
+the pool is recreated and the instances that were in flight are submitted again. An instance that was in flight
+during two such crashes is solved alone, in a pool of its own: if its worker dies again, it gets the crashed status,
+so an instance that kills its worker costs its own result and not those of the others.
+
+Usage (from the repository root):
+    python BatchSolver.py blocks INPUT [--output results.jsonl] [--workers N] [--timeout 60] [--memory 1024]
+    python BatchSolver.py puzzle INPUT [--heuristic euristica_admisibila_2] [--pdb DIRECTORY] [--distance-table FILE]
+"""
+import argparse
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import json
+import os
+import resource
+import signal
+import sys
+import time
+
+INSTANCE_SEPARATOR = "====="
+DEFAULT_HEURISTICS = {"blocks": "euristica_admisibila_2", "puzzle": "euristica_admisibila_2"}
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def readInstances(fileName):
+    """Yields the instances of a multi-instance file one by one, without reading the whole file
+
+    Returns:
+        generator of (str, str): The name of the instance (file#index) and its data
+    """
+    index = 0
+    lines = []
+    with open(fileName) as fin:
+        for line in fin:
+            if line.strip() == INSTANCE_SEPARATOR:
+                if "".join(lines).strip():
+                    yield f"{fileName}#{index}", "".join(lines)
+                    index += 1
+                lines = []
+            else:
+                lines.append(line)
+    if "".join(lines).strip():
+        yield f"{fileName}#{index}", "".join(lines)
+
+
+def streamInstances(path):
+    """Yields the instances of a file, or of all the files of a directory"""
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            fileName = os.path.join(path, name)
+            if os.path.isfile(fileName):
+                yield from readInstances(fileName)
+    else:
+        yield from readInstances(path)
+
+
+# the options of the worker process, set once by initWorker
+workerOptions = {}
+# the pattern databases / distance tables used by the previous instances of the worker, reused by the next ones
+workerTables = {}
+
+
+def raiseTimeout(signum, frame):
+    raise SearchTimeout()
+
+
+def initWorker(options):
+    """Runs once in every worker process: stores the options and sets the memory cap"""
+    workerOptions.update(options)
+    if options["memory"]:
+        limit = options["memory"] * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    signal.signal(signal.SIGALRM, raiseTimeout)
+
+
+def solve(domain, data, heuristicType):
+    """Solves one instance in the worker process
+
+    Returns:
+        (Node, int, function): The solution node (or None), the number of expanded nodes
+            and a function that turns the info of a node into plain lists
+    """
+    if domain == "blocks":
+        import Lab2_AStar_Blocks as lab
+        graph = lab.Graph(data)
+        solution, expandedNodes = lab.aStarSearch(graph, heuristicType)
+        return solution, expandedNodes, lambda info: info.toLists()
+
+    import Lab3_8puzzle as lab
+    graph = lab.PackedGraph(data)
+    for attribute in ["patternDatabase", "distanceTable"]:
+        table = workerTables.get((attribute, graph.width))
+        if table is not None:
+            setattr(graph, attribute, table)
+    if workerOptions["pdb"] and graph.patternDatabase is None:
+        graph.loadPatternDatabase(workerOptions["pdb"])
+    if workerOptions["distanceTable"] and graph.distanceTable is None:
+        graph.loadDistanceTable(workerOptions["distanceTable"])
+
+    if heuristicType == "euristica_exacta":
+        solution = lab.solveWithDistanceTable(graph)
+        expandedNodes = solution.cost if solution is not None else 0
+    else:
+        solution, expandedNodes = lab.idaStar(graph, heuristicType)
+
+    # the tables built on first use are kept for the next instances of the same size
+    for attribute in ["patternDatabase", "distanceTable"]:
+        if getattr(graph, attribute) is not None:
+            workerTables[(attribute, graph.width)] = getattr(graph, attribute)
+    return solution, expandedNodes, lambda info: lab.unpackState(info).toLists()
+
+
+def describeSolution(solution, expandedNodes, toLists):
+    """The fields of a result that describe the solution (see solve)
+
+    Returns:
+        dict: The status, and for a solved instance the cost, the length (the number of moves) and the path
+    """
+    result = {"status": "no_solution"}
+    if solution is not None:
+        path = solution.getPath()
+        result["status"] = "solved"
+        result["cost"] = solution.cost
+        result["length"] = len(path) - 1
+        result["path"] = [toLists(node.info) for node in path]
+    result["expansions"] = expandedNodes
+    return result
+
+
+def solveInstance(name, data):
+    """The task run by the pool for each instance
+
+    Returns:
+        dict: The result of the instance, to be written as a JSON line
+    """
+    result = {"instance": name}
+    start = time.perf_counter()
+    try:
+        signal.setitimer(signal.ITIMER_REAL, workerOptions["timeout"])
+        try:
+            solution, expandedNodes, toLists = solve(workerOptions["domain"], data, workerOptions["heuristic"])
+        finally:
+            # the timer is stopped before the outcome is classified, so the alarm can't interrupt a handler
+            # (if it goes off right before this, the SearchTimeout replaces the exception of the search)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        result.update(describeSolution(solution, expandedNodes, toLists))
+    except SearchTimeout:
+        result["status"] = "timeout"
+    except MemoryError:
+        result["status"] = "memory"
+    except Exception as e:
+        result["status"] = "error"
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def newPool(workers, options):
+    return concurrent.futures.ProcessPoolExecutor(workers, initializer=initWorker, initargs=(options,))
+
+
+def solveIsolated(name, data, options):
+    """Solves an instance in a pool of its own, so that if the worker dies, the instance is the cause
+
+    Returns:
+        dict: The result of the instance, with the crashed status if the worker died
+    """
+    with newPool(1, options) as executor:
+        try:
+            return executor.submit(solveInstance, name, data).result()
+        except concurrent.futures.process.BrokenProcessPool:
+            return {"instance": name, "status": "crashed"}
+
+
+def runBatch(instances, fout, options, workers):
+    """Solves the instances with a pool of worker processes and writes the results in completion order.
+    At most 2 instances per worker are submitted at any time, so the instances are read as they are needed.
+    If a worker dies, the pool is recreated (see the module documentation)
+
+    Returns:
+        dict: The number of results for each status
+    """
+    statuses = {}
+    # the instance of each submitted future
+    pending = {}
+    # the instances that were in flight when the pool broke, submitted again before the next ones
+    retries = collections.deque()
+    # the names of the instances that were in flight when the pool broke
+    suspects = set()
+    instances = iter(instances)
+
+    def collect(future):
+        """Writes the result of a finished future, returns False if its worker died"""
+        name, data = pending.pop(future)
+        try:
+            result = future.result()
+        except concurrent.futures.process.BrokenProcessPool:
+            if name not in suspects:
+                suspects.add(name)
+                retries.append((name, data))
+                return False
+            result = solveIsolated(name, data, options)
+        statuses[result["status"]] = statuses.get(result["status"], 0) + 1
+        fout.write(json.dumps(result) + "\n")
+        return True
+
+    executor = newPool(workers, options)
+    try:
+        while True:
+            while len(pending) < 2 * workers:
+                if retries:
+                    name, data = retries.popleft()
+                else:
+                    instance = next(instances, None)
+                    if instance is None:
+                        break
+                    name, data = instance
+                pending[executor.submit(solveInstance, name, data)] = (name, data)
+            if not pending:
+                break
+
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                broken = not collect(future) or broken
+            if broken:
+                # every future of a broken pool fails, so we wait for all of them and start a new pool
+                executor.shutdown(wait=True)
+                for future in list(pending):
+                    collect(future)
+                executor = newPool(workers, options)
+            fout.flush()
+    finally:
+        executor.shutdown(wait=True)
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("domain", choices=sorted(DEFAULT_HEURISTICS))
+    parser.add_argument("input", help="a multi-instance file or a directory")
+    parser.add_argument("--output", help="the JSON lines file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--timeout", type=float, default=60, help="seconds per instance")
+    parser.add_argument("--memory", type=int, default=1024, help="MB per worker (0 for no limit)")
+    parser.add_argument("--heuristic")
+    parser.add_argument("--pdb", help="the directory of the pattern databases (puzzle, euristica_pdb)")
+    parser.add_argument("--distance-table", help="the distance table file (puzzle, euristica_exacta)")
+    args = parser.parse_args()
+
+    options = {
+        "domain": args.domain,
+        "heuristic": args.heuristic or DEFAULT_HEURISTICS[args.domain],
+        "timeout": args.timeout,
+        "memory": args.memory,
+        "pdb": args.pdb,
+        "distanceTable": args.distance_table,
+    }
+
+    start = time.perf_counter()
+    fout = open(args.output, "w") if args.output else sys.stdout
+    try:
+        statuses = runBatch(streamInstances(args.input), fout, options, args.workers)
+    finally:
+        if args.output:
+            fout.close()
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+    print(f"{sum(statuses.values())} instances in {time.perf_counter() - start:.2f}s ({summary})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,13 @@
-import copy
+import argparse
 
 from libs.TraversalTree.Node import Node as AbstractNode
+from libs.TraversalTree.CompactNode import CompactNode as AbstractCompactNode
 from libs.TraversalTree.Graph import Graph as AbstractGraph
+from libs.TraversalTree import Search
+from libs.TraversalTree.Bidirectional import bidirectionalSearch
+from libs.TraversalTree.ExternalBreadthFirst import externalBreadthFirst as externalBreadthFirstSearch
+from libs.TraversalTree.Instrumentation import instrumentRun
+from libs.TraversalTree.State import State
 
 
 class Node(AbstractNode):
@@ -20,10 +26,34 @@ class Node(AbstractNode):
         return s
 
 
+class CompactNode(AbstractCompactNode):
+    """A Node that uses __slots__ and stores only the move (block, source stack, destination stack) instead of the stacks.
+    To use it, set graph.nodeClass = CompactNode
+    """
+    __slots__ = ()
+
+    __str__ = Node.__str__
+
+    @staticmethod
+    def applyMove(info, move):
+        block, fromStack, toStack = move
+        stacks = list(info.rows)
+        stacks[fromStack] = stacks[fromStack][:-1]
+        stacks[toStack] = stacks[toStack] + (block,)
+        return State.fromTuples(tuple(stacks))
+
+    @staticmethod
+    def undoMove(info, move):
+        block, fromStack, toStack = move
+        return CompactNode.applyMove(info, (block, toStack, fromStack))
+
+
 class Graph(AbstractGraph):
+    nodeClass = Node
+
     def __init__(self, data):
-        """We will represent a configuration of the stacks as a list of lists.
-        The outer list represents the current configuration of the stacks and each inner list represents the block contained in each stack
+        """We will represent a configuration of the stacks as a State (i.e. an immutable tuple of tuples).
+        The outer tuple represents the current configuration of the stacks and each inner tuple represents the block contained in each stack
 
         Args:
             data (str): The data that should be parsed into the start state and scope states
@@ -39,8 +69,8 @@ class Graph(AbstractGraph):
                 b a
                 c
             Will be parsed into:
-                start: [['a'], ['c', 'b']]
-                scopes: [[['b', 'c', 'a'], []], [['b', 'a'], ['c']]]
+                start: (('a',), ('c', 'b'))
+                scopes: [(('b', 'c', 'a'), ()), (('b', 'a'), ('c',))]
         """
 
         [start, scopes] = data.strip().split("stari_finale")
@@ -49,9 +79,17 @@ class Graph(AbstractGraph):
         self.scopes = []
         for scope in scopes:
             self.scopes.append(self.parseStack(scope))
+        # the scopes are also kept in a set, so that checking if a state is a scope takes O(1)
+        self.scopesSet = frozenset(self.scopes)
+
+        # the codes of the blocks in the encoded states (see encodeState), 0 separates the stacks
+        self.blocks = sorted(block for stack in self.start for block in stack)
+        self.blockCodes = {block: code for code, block in enumerate(self.blocks, 1)}
+        # every state has the same blocks and stacks, so all the encoded states have the same length
+        self.recordSize = len(self.blocks) + len(self.start) - 1
 
     def parseStack(self, data):
-        """A method that parses a string into a list of lists
+        """A method that parses a string into a State
 
         Args:
             data (str): The data that should be parsed into a state
@@ -60,13 +98,31 @@ class Graph(AbstractGraph):
             The input:
                 a
                 c b
-            Will be parsed into: [['a'], ['c', 'b']]
+            Will be parsed into: (('a',), ('c', 'b'))
         """
         stacksStr = data.strip().split("\n")
         stacks = [stackStr.strip().split(" ") if stackStr != "#" else []
                   for stackStr in stacksStr]
 
-        return stacks
+        return State(stacks)
+
+    def encodeState(self, nodeInfo):
+        """Encodes a state as bytes, one byte for each block and a 0 byte between two stacks
+        (used by the external breadth first search, which keeps the states in files)
+
+        Example:
+            With the blocks a, b, c the state (('a',), ('c', 'b')) is encoded as b'\\x01\\x00\\x03\\x02'
+        """
+        codes = []
+        for i, stack in enumerate(nodeInfo):
+            if i > 0:
+                codes.append(0)
+            codes.extend(self.blockCodes[block] for block in stack)
+        return bytes(codes)
+
+    def decodeState(self, record):
+        """The inverse of encodeState"""
+        return State.fromTuples(tuple(tuple(self.blocks[code - 1] for code in stack) for stack in record.split(b"\x00")))
 
     def testScope(self, currentNode):
         """Check if the current node's info (i.e. the current configuration of the stacks) is part of the scope configurations.
@@ -77,15 +133,16 @@ class Graph(AbstractGraph):
         Returns:
             bool: True if the current node is a scope state, False otherwise
         """
-        return currentNode.info in self.scopes
+        return currentNode.info in self.scopesSet
 
-    def generateSuccessors(self, currentNode):
+    def generateSuccessors(self, currentNode, heuristicType=None):
         """A method that generates all possible next states based on the current one.
         We take each block that is on top of a stack and we move it on top of all the other stacks.
         The cost for each move is the alphabetical index associated with the block's label
 
         Args:
             currentNode (Node)
+            heuristicType (String): Not used, the searches of this lab are uninformed
 
         Returns:
             [Node]: A list containing all possible next states
@@ -96,19 +153,23 @@ class Graph(AbstractGraph):
             # if the current stack is empty we can't do anything
             if len(currentStacks[i]) == 0:
                 continue
-            tempStacks = copy.deepcopy(currentStacks)
-            blockToMove = tempStacks[i].pop()
+            # the stacks are immutable tuples, so the successors share all the stacks that are not modified by the move
+            # and only the source and destination stacks are allocated
+            blockToMove = currentStacks[i][-1]
+            reducedStack = currentStacks[i][:-1]
 
             for j in range(len(currentStacks)):
                 # we don't want to add the block back on the same stack
                 if i == j:
                     continue
 
-                newStacks = copy.deepcopy(tempStacks)
-                newStacks[j].append(blockToMove)
+                newStacks = list(currentStacks.rows)
+                newStacks[i] = reducedStack
+                newStacks[j] = currentStacks[j] + (blockToMove,)
+                newStacks = State.fromTuples(tuple(newStacks))
                 if not currentNode.containsInPath(newStacks):
-                    newNode = Node(
-                        newStacks, currentNode, currentNode.cost + ord(blockToMove) - ord('a') + 1)
+                    newNode = self.nodeClass(
+                        newStacks, currentNode, currentNode.cost + ord(blockToMove) - ord('a') + 1, move=(blockToMove, i, j))
                     lstSucc.append(newNode)
 
         return lstSucc
@@ -123,93 +184,79 @@ class Graph(AbstractGraph):
         return s
 
 
-def breadthFirst(graph, numOfSolutions):
-    queue = [Node(graph.start, None)]
+def breadthFirst(graph, numOfSolutions, stats=None):
+    Search.printSolutions(Search.breadthFirst(graph, stats=stats), numOfSolutions)
 
-    while len(queue) > 0:
-        currentNode = queue.pop(0)
 
-        if graph.testScope(currentNode):
-            print("Solution!")
-            currentNode.printPath(printLength=True)
-            print("================================\n")
-            numOfSolutions -= 1
-            input()
+def breadthFirstHashed(graph, numOfSolutions, stats=None):
+    """Breadth first search with global duplicate detection.
 
-            if numOfSolutions == 0:
-                return
+    We count how many times each state was reached: a state is added to the queue at most numOfSolutions times,
+    so the same state isn't expanded again and again through every path that leads to it, and the memory is
+    bounded by numOfSolutions * the number of states. With numOfSolutions = 1 this is the classic BFS with a visited set.
+    """
+    Search.printSolutions(Search.breadthFirstHashed(graph, maxVisits=numOfSolutions, stats=stats), numOfSolutions)
 
-        succ = graph.generateSuccessors(currentNode)
-        queue.extend(succ)
 
+def externalBreadthFirst(graph, numOfSolutions, directory=None, runSize=1000000, stats=None):
+    """Breadth first search that keeps the visited states in files instead of memory, for the instances whose
+    visited set doesn't fit in memory. Like breadthFirstHashed with numOfSolutions = 1, each state is reached once.
 
-def iterativeDepthFirst(graph, maxDepth, numOfSolutions):
-    for d in range(1, maxDepth + 1):
-        if numOfSolutions == 0:
-            return
-        numOfSolutions = depthFirst(graph, Node(
-            graph.start, None), d, numOfSolutions)
+    Args:
+        directory (str): Where the layer files are written, a new temporary directory if not given
+        runSize (int): The number of states sorted in memory at a time
+    """
+    Search.printSolutions(externalBreadthFirstSearch(graph, directory, runSize, stats=stats), numOfSolutions)
 
 
-def depthFirst(graph, currentNode, depth, numOfSolutions):
-    if depth == 1 and graph.testScope(currentNode):
-        print("Solution!")
-        currentNode.printPath(printLength=True)
-        print("================================\n")
-        numOfSolutions -= 1
-        input()
-
-        if numOfSolutions == 0:
-            return 0
-
-    if depth > 1:
-        succ = graph.generateSuccessors(currentNode)
-        for nextNode in succ:
-            if numOfSolutions != 0:
-                numOfSolutions = depthFirst(
-                    graph, nextNode, depth - 1, numOfSolutions)
-
-    return numOfSolutions
-
+def iterativeDepthFirst(graph, maxDepth, numOfSolutions, stats=None):
+    Search.printSolutions(Search.iterativeDepthFirst(graph, maxDepth, stats=stats), numOfSolutions)
 
-def uniformCostSearch(graph, numOfSolutions):
-    queue = [Node(graph.start, None, 0)]
 
-    while len(queue) > 0:
-        currentNode = queue.pop(0)
+def depthFirst(graph, currentNode, depth, numOfSolutions, stats=None):
+    return Search.printSolutions(Search.depthFirst(graph, currentNode, depth, stats=stats), numOfSolutions)
 
-        if graph.testScope(currentNode):
-            print("Solution!")
-            currentNode.printPath(printLength=True, printCost=True)
-            print("================================\n")
-            numOfSolutions -= 1
-            input()
 
-            if numOfSolutions == 0:
-                return
+def uniformCostSearch(graph, numOfSolutions, stats=None):
+    Search.printSolutions(Search.uniformCostSearch(graph, stats=stats), numOfSolutions, printCost=True)
 
-        succ = graph.generateSuccessors(currentNode)
 
-        # we insert each new node in the correct position in order to keep the queue sorted
-        for s in succ:
-            i = 0
-            foundPos = False
-            for i in range(len(queue)):
-                if queue[i].cost > s.cost:
-                    foundPos = True
-                    break
-
-            if foundPos:
-                queue.insert(i, s)
-            else:
-                queue.append(s)
-
-
-with open("blocks.txt") as fin:
-    data = fin.read()
-
-g = Graph(data)
-print(g)
-# breadthFirst(g, numOfSolutions=3)
-# iterativeDepthFirst(g, maxDepth=5, numOfSolutions=4)
-uniformCostSearch(g, numOfSolutions=5)
+def bidirectionalUniformCostSearch(graph):
+    """The cheapest solution, found by a uniform cost search from the start state and another one from all the scope
+    states at once, which meet in the middle (see Bidirectional.bidirectionalSearch). Prints the counters of each direction
+    """
+    solution, forwardStats, backwardStats = bidirectionalSearch(graph)
+    if solution is not None:
+        print("Solution!")
+        solution.printPath(printLength=True, printCost=True)
+        print("================================\n")
+    print(f"forward: {forwardStats}\nbackward: {backwardStats}")
+
+
+def kBestUniformCostSearch(graph, numOfSolutions, stats=None):
+    """The numOfSolutions cheapest solutions (Yen's algorithm, see Search.kBestUniformCostSearch)"""
+    Search.printSolutions(Search.kBestUniformCostSearch(graph, numOfSolutions, stats=stats), numOfSolutions, printCost=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stats", action="store_true", help="print the progress, the counters and the timings of the search")
+    parser.add_argument("--profile", action="store_true", help="run the search under cProfile")
+    args = parser.parse_args()
+
+    with open("blocks.txt") as fin:
+        data = fin.read()
+
+    g = Graph(data)
+    print(g)
+    with instrumentRun(g, stats=args.stats, profile=args.profile) as stats:
+        # breadthFirst(g, numOfSolutions=3, stats=stats)
+        # breadthFirstHashed(g, numOfSolutions=3, stats=stats)
+        # the visited states are kept on disk, for the instances that don't fit in memory
+        # externalBreadthFirst(g, numOfSolutions=3, stats=stats)
+        # iterativeDepthFirst(g, maxDepth=5, numOfSolutions=4, stats=stats)
+        # the same solutions, without letting the queue grow exponentially
+        # kBestUniformCostSearch(g, numOfSolutions=5, stats=stats)
+        # the cheapest solution only, searching from both ends
+        # bidirectionalUniformCostSearch(g)
+        uniformCostSearch(g, numOfSolutions=5, stats=stats)
@@ -1,10 +1,24 @@
+import argparse
 import copy
+import heapq
+import itertools
+import math
+import time
 
 from libs.TraversalTree.Node import Node as AbstractNode
+from libs.TraversalTree.CompactNode import CompactNode as AbstractCompactNode
 from libs.TraversalTree.Graph import Graph as AbstractGraph
+from libs.TraversalTree import Bidirectional
+from libs.TraversalTree import Search
+from libs.TraversalTree.Instrumentation import instrumentRun
+from libs.TraversalTree.SearchStats import SearchStats
+from libs.TraversalTree.State import State
 
 
 class Node(AbstractNode):
+    # the estimates towards each scope state (see Graph.calcHeuristicParts), used to update the heuristic incrementally
+    heuristicParts = None
+
     def __str__(self):
         s = ""
 
@@ -20,10 +34,47 @@ class Node(AbstractNode):
         return s
 
 
+class CompactNode(AbstractCompactNode):
+    """A Node that uses __slots__ and stores only the move (block, source stack, destination stack) instead of the stacks.
+    To use it, set graph.nodeClass = CompactNode
+    """
+    __slots__ = ('heuristicParts',)
+
+    __str__ = Node.__str__
+
+    def __init__(self, info, parent, cost=1, heuristic=1, move=None):
+        super().__init__(info, parent, cost, heuristic, move)
+        self.heuristicParts = None
+
+    @staticmethod
+    def applyMove(info, move):
+        block, fromStack, toStack = move
+        stacks = list(info.rows)
+        stacks[fromStack] = stacks[fromStack][:-1]
+        stacks[toStack] = stacks[toStack] + (block,)
+        return State.fromTuples(tuple(stacks))
+
+    @staticmethod
+    def undoMove(info, move):
+        block, fromStack, toStack = move
+        return CompactNode.applyMove(info, (block, toStack, fromStack))
+
+
 class Graph(AbstractGraph):
+    nodeClass = Node
+    # when True, every incrementally updated heuristic is checked against a full recomputation
+    checkHeuristicDeltas = False
+    # the heuristics that can be passed to the searches (see AbstractGraph.getHeuristic)
+    heuristics = {
+        "euristica_banala": "basicHeuristic",
+        "euristica_admisibila_1": "admissibleHeuristic1",
+        "euristica_admisibila_2": "admissibleHeuristic2",
+        "euristica_admisibila_3": "admissibleHeuristic3",
+    }
+
     def __init__(self, data):
-        """We will represent a configuration of the stacks as a list of lists.
-        The outer list represents the current configuration of the stacks and each inner list represents the block contained in each stack
+        """We will represent a configuration of the stacks as a State (i.e. an immutable tuple of tuples).
+        The outer tuple represents the current configuration of the stacks and each inner tuple represents the block contained in each stack
 
         Args:
             data (str): The data that should be parsed into the start state and scope states
@@ -39,8 +90,8 @@ class Graph(AbstractGraph):
                 b a
                 c
             Will be parsed into:
-                start: [['a'], ['c', 'b']]
-                scopes: [[['b', 'c', 'a'], []], [['b', 'a'], ['c']]]
+                start: (('a',), ('c', 'b'))
+                scopes: [(('b', 'c', 'a'), ()), (('b', 'a'), ('c',))]
         """
 
         [start, scopes] = data.strip().split("stari_finale")
@@ -49,9 +100,14 @@ class Graph(AbstractGraph):
         self.scopes = []
         for scope in scopes:
             self.scopes.append(self.parseStack(scope))
+        # the scopes are also kept in a set, so that checking if a state is a scope takes O(1)
+        self.scopesSet = frozenset(self.scopes)
+
+        # the goal index: scopePositions[k][block] = (the index of the block's stack, the block's height) in the k-th scope
+        self.scopePositions = [self.getBlocksPositions(scope) for scope in self.scopes]
 
     def parseStack(self, data):
-        """A method that parses a string into a list of lists
+        """A method that parses a string into a State
 
         Args:
             data (str): The data that should be parsed into a state
@@ -60,13 +116,26 @@ class Graph(AbstractGraph):
             The input:
                 a
                 c b
-            Will be parsed into: [['a'], ['c', 'b']]
+            Will be parsed into: (('a',), ('c', 'b'))
         """
         stacksStr = data.strip().split("\n")
         stacks = [stackStr.strip().split(" ") if stackStr != "#" else []
                   for stackStr in stacksStr]
 
-        return stacks
+        return State(stacks)
+
+    def reversedGraph(self):
+        """The same blocks world with the start state as its only scope state, so that its heuristics estimate the cost
+        towards the start state. Since a move can be undone at the same cost, it is used to search backwards from the
+        scope states (see Bidirectional.bidirectionalSearch)
+        """
+        graph = copy.copy(self)
+        graph.scopes = [self.start]
+        graph.scopesSet = frozenset(graph.scopes)
+        graph.scopePositions = [self.getBlocksPositions(self.start)]
+        # the heuristics resolved by this graph are bound to it (see AbstractGraph.getHeuristic)
+        graph.resolvedHeuristics = None
+        return graph
 
     def testScope(self, currentNode):
         """Check if the current node's info (i.e. the current configuration of the stacks) is part of the scope configurations.
@@ -77,38 +146,53 @@ class Graph(AbstractGraph):
         Returns:
             bool: True if the current node is a scope state, False otherwise
         """
-        return currentNode.info in self.scopes
+        return currentNode.info in self.scopesSet
 
     def generateSuccessors(self, currentNode, heuristicType):
         """A method that generates all possible next states based on the current one.
         We take each block that is on top of a stack and we move it on top of all the other stacks.
         The cost for each move is the alphabetical index associated with the block's label
 
+        Since a move changes the position of a single block, the heuristic of each successor is updated
+        from the heuristic of the current node (see updateHeuristic) instead of being recalculated.
+
         Args:
             currentNode (Node)
+            heuristicType (String): The heuristic to be used for calculations
 
         Returns:
             [Node]: A list containing all possible next states
         """
         lstSucc = []
         currentStacks = currentNode.info
+        parentParts = currentNode.heuristicParts
+        if parentParts is None:
+            parentParts = self.calcHeuristicParts(currentStacks, heuristicType)
+
         for i in range(len(currentStacks)):
             # if the current stack is empty we can't do anything
             if len(currentStacks[i]) == 0:
                 continue
-            tempStacks = copy.deepcopy(currentStacks)
-            blockToMove = tempStacks[i].pop()
+            # the stacks are immutable tuples, so the successors share all the stacks that are not modified by the move
+            # and only the source and destination stacks are allocated
+            blockToMove = currentStacks[i][-1]
+            reducedStack = currentStacks[i][:-1]
 
             for j in range(len(currentStacks)):
                 # we don't want to add the block back on the same stack
                 if i == j:
                     continue
 
-                newStacks = copy.deepcopy(tempStacks)
-                newStacks[j].append(blockToMove)
+                newStacks = list(currentStacks.rows)
+                newStacks[i] = reducedStack
+                newStacks[j] = currentStacks[j] + (blockToMove,)
+                newStacks = State.fromTuples(tuple(newStacks))
                 if not currentNode.containsInPath(newStacks):
-                    newNode = Node(
-                        newStacks, currentNode, currentNode.cost + ord(blockToMove) - ord('a') + 1, self.calcHeuristic(newStacks, heuristicType))
+                    heuristic, parts = self.updateHeuristic(
+                        parentParts, newStacks, blockToMove, (i, len(currentStacks[i]) - 1), (j, len(currentStacks[j])), heuristicType)
+                    newNode = self.nodeClass(
+                        newStacks, currentNode, currentNode.cost + ord(blockToMove) - ord('a') + 1, heuristic, (blockToMove, i, j))
+                    newNode.heuristicParts = parts
                     lstSucc.append(newNode)
 
         return lstSucc
@@ -128,50 +212,132 @@ class Graph(AbstractGraph):
             blocks.extend(st)
         return blocks
 
-    def calcHeuristic(self, nodeInfo, heuristicType):
-        """Given a node's info and an heuristic type we calculate the heuristic for the current node
+    def calcHeuristicParts(self, nodeInfo, heuristicType):
+        """Calculates the estimates towards each scope state, the heuristic being their minimum
 
         Args:
             nodeInfo (Node.info)
             heuristicType (String): The heuristic to be used for calculations
 
         Returns:
-            Int: The heuristic value for the current node
+            (Int): The estimate for each scope state, or None if the heuristic can't be updated incrementally
         """
-        if heuristicType == "euristica_banala":
-            return self.basicHeuristic(nodeInfo)
-        elif heuristicType == "euristica_admisibila_1":
-            return self.admissibleHeuristic1(nodeInfo)
+        blocksPositions = self.getBlocksPositions(nodeInfo)
+        if heuristicType == "euristica_admisibila_1":
+            return tuple(self.calculateHeuristicCost1(blocksPositions, scopePositions)
+                         for scopePositions in self.scopePositions)
         elif heuristicType == "euristica_admisibila_2":
-            return self.admissibleHeuristic2(nodeInfo)
+            return tuple(self.calculateHeuristicCost2(blocksPositions, scopePositions)
+                         for scopePositions in self.scopePositions)
+        elif heuristicType == "euristica_admisibila_3":
+            return tuple(self.calculateHeuristicCost3(nodeInfo, scope) for scope in self.scopes)
+        return None
+
+    def blockHeuristicCost(self, block, position, scopePositions, heuristicType):
+        """The contribution of a single block to the estimate towards a scope state
+
+        Args:
+            block (str): The block's label
+            position ((int, int)): The index of the block's stack and the block's height in the current state
+            scopePositions (dict): The position of each block in the scope state
+            heuristicType (String)
+        """
+        if heuristicType == "euristica_admisibila_1":
+            return 1 if position[0] != scopePositions[block][0] else 0
+        return ord(block) - ord('a') + 1 if position != scopePositions[block] else 0
+
+    def wellPlacedBlockCost(self, block, position, stackBelow, scope):
+        """The contribution of a single block to the estimate of euristica_admisibila_3 towards a scope state:
+        0 if the block and all the blocks below it are where they are in the scope state, else the cost of the block
+
+        Args:
+            block (str): The block's label
+            position ((int, int)): The index of the block's stack and the block's height in the current state
+            stackBelow (tuple): The blocks below it in the current state
+            scope (State)
+        """
+        index, height = position
+        scopeStack = scope[index]
+        if height < len(scopeStack) and scopeStack[height] == block and scopeStack[:height] == stackBelow:
+            return 0
+        return ord(block) - ord('a') + 1
+
+    def updateHeuristic(self, parentParts, nodeInfo, block, oldPosition, newPosition, heuristicType):
+        """Calculates the heuristic of a successor from the estimates of its parent, knowing that only one block was moved.
+        Only the moved block's contribution changes, so each estimate is updated in O(1)
+        (in O(height) for euristica_admisibila_3, which compares the stacks below the block with the scope's).
+
+        Args:
+            parentParts ((Int)): The estimates of the parent (see calcHeuristicParts)
+            nodeInfo (Node.info): The successor's info
+            block (str): The moved block
+            oldPosition ((int, int)): The position of the block before the move
+            newPosition ((int, int)): The position of the block after the move
+            heuristicType (String)
+
+        Returns:
+            (Int, (Int)): The heuristic value and the estimates of the successor
+        """
+        if parentParts is None:
+            return self.calcHeuristic(nodeInfo, heuristicType), None
+
+        if heuristicType == "euristica_admisibila_3":
+            # the blocks below the moved one are not moved, so they are the same before and after the move
+            oldStackBelow = nodeInfo[oldPosition[0]]
+            newStackBelow = nodeInfo[newPosition[0]][:-1]
+            parts = tuple(
+                part
+                - self.wellPlacedBlockCost(block, oldPosition, oldStackBelow, scope)
+                + self.wellPlacedBlockCost(block, newPosition, newStackBelow, scope)
+                for part, scope in zip(parentParts, self.scopes)
+            )
         else:
-            raise Exception("Unknown heuristic type")
+            parts = tuple(
+                part
+                - self.blockHeuristicCost(block, oldPosition, scopePositions, heuristicType)
+                + self.blockHeuristicCost(block, newPosition, scopePositions, heuristicType)
+                for part, scopePositions in zip(parentParts, self.scopePositions)
+            )
+        heuristic = min(parts)
+
+        if self.checkHeuristicDeltas:
+            expectedParts = self.calcHeuristicParts(nodeInfo, heuristicType)
+            if parts != expectedParts or heuristic != self.calcHeuristic(nodeInfo, heuristicType):
+                raise Exception(
+                    f"Incremental heuristic {parts} differs from the recalculated one {expectedParts} for {nodeInfo}")
+
+        return heuristic, parts
 
     def basicHeuristic(self, nodeInfo):
-        return 0 if nodeInfo in self.scopes else 1
+        return 0 if nodeInfo in self.scopesSet else 1
 
-    def calculateHeuristicCost1(self, nodeInfo, scopeInfo):
-        heuristicCost = 0
+    def getBlocksPositions(self, nodeInfo):
+        """Maps each block to its position in the given configuration
 
-        for block in self.getBlocksLabels():
-            foundIndexInNode = False
-            indexInNode = 0
-            while not foundIndexInNode:
-                if block in nodeInfo[indexInNode]:
-                    foundIndexInNode = True
-                    break
-                indexInNode += 1
+        Returns:
+            dict: block -> (the index of the block's stack, the block's height)
+        """
+        positions = {}
+        for indexInNode, stack in enumerate(nodeInfo):
+            for height, block in enumerate(stack):
+                positions[block] = (indexInNode, height)
+        return positions
 
-            foundIndexInScope = False
-            indexInScope = 0
-            while not foundIndexInScope:
-                if block in scopeInfo[indexInScope]:
-                    foundIndexInScope = True
-                    break
-                indexInScope += 1
+    def calculateHeuristicCost1(self, blocksPositions, scopePositions, bound=math.inf):
+        """Counts the blocks that are not in the same stack as in the scope state.
+        The count stops as soon as it reaches bound, since the estimate can't be the minimum anymore.
 
-            if indexInNode != indexInScope:
+        Args:
+            blocksPositions (dict): The positions of the blocks in the current state (see getBlocksPositions)
+            scopePositions (dict): The positions of the blocks in the scope state (see Graph.scopePositions)
+            bound (Int): The best estimate found so far
+        """
+        heuristicCost = 0
+        for block, (indexInNode, _) in blocksPositions.items():
+            if indexInNode != scopePositions[block][0]:
                 heuristicCost += 1
+                if heuristicCost >= bound:
+                    break
 
         return heuristicCost
 
@@ -184,37 +350,32 @@ class Graph(AbstractGraph):
         Dintre toate estimarile calculate pentru fiecare stare finala, alegem
         drept euristica estimarea minima.
         """
+        blocksPositions = self.getBlocksPositions(nodeInfo)
+        heuristicCost = math.inf
 
-        heuristicCost = self.calculateHeuristicCost1(
-            nodeInfo, self.scopes[0])
-
-        for scope in self.scopes:
+        for scopePositions in self.scopePositions:
             heuristicCost = min(heuristicCost, self.calculateHeuristicCost1(
-                nodeInfo, scope))
+                blocksPositions, scopePositions, heuristicCost))
+            if heuristicCost == 0:
+                break
 
         return heuristicCost
 
-    def calculateHeuristicCost2(self, nodeInfo, scopeInfo):
-        heuristicCost = 0
-        for block in self.getBlocksLabels():
-            foundIndexInNode = False
-            indexInNode = 0
-            while not foundIndexInNode:
-                if block in nodeInfo[indexInNode]:
-                    foundIndexInNode = True
-                    break
-                indexInNode += 1
-
-            foundIndexInScope = False
-            indexInScope = 0
-            while not foundIndexInScope:
-                if block in scopeInfo[indexInScope]:
-                    foundIndexInScope = True
-                    break
-                indexInScope += 1
+    def calculateHeuristicCost2(self, blocksPositions, scopePositions, bound=math.inf):
+        """Adds up the costs of the blocks that are not in the same position as in the scope state.
+        The sum stops as soon as it reaches bound, since the estimate can't be the minimum anymore.
 
-            if indexInNode != indexInScope or nodeInfo[indexInNode].index(block) != scopeInfo[indexInScope].index(block):
+        Args:
+            blocksPositions (dict): The positions of the blocks in the current state (see getBlocksPositions)
+            scopePositions (dict): The positions of the blocks in the scope state (see Graph.scopePositions)
+            bound (Int): The best estimate found so far
+        """
+        heuristicCost = 0
+        for block, position in blocksPositions.items():
+            if position != scopePositions[block]:
                 heuristicCost += ord(block) - ord('a') + 1
+                if heuristicCost >= bound:
+                    break
 
         return heuristicCost
 
@@ -225,72 +386,419 @@ class Graph(AbstractGraph):
         o data, deci pentru a ajunge la starea finala vom face la un moment dat
         un pas de costul respectiv).
         """
-        heuristicCost = self.calculateHeuristicCost2(
-            nodeInfo, self.scopes[0])
+        blocksPositions = self.getBlocksPositions(nodeInfo)
+        heuristicCost = math.inf
 
-        for scope in self.scopes:
+        for scopePositions in self.scopePositions:
             heuristicCost = min(heuristicCost, self.calculateHeuristicCost2(
-                nodeInfo, scope))
+                blocksPositions, scopePositions, heuristicCost))
+            if heuristicCost == 0:
+                break
 
         return heuristicCost
 
+    def calculateHeuristicCost3(self, nodeInfo, scope, bound=math.inf):
+        """Adds up the costs of the blocks that are not well placed: a block is well placed if it is in the same
+        position as in the scope state and so are all the blocks below it (i.e. it is in the longest common prefix
+        of its stack and of the scope's stack). The sum stops as soon as it reaches bound.
 
-def aStar(graph, heuristicType):
-    open = [Node(graph.start, None, 0)]
-    closed = []
+        Args:
+            nodeInfo (Node.info)
+            scope (State): The scope state
+            bound (Int): The best estimate found so far
+        """
+        heuristicCost = 0
+        for stack, scopeStack in zip(nodeInfo, scope):
+            wellPlaced = 0
+            limit = min(len(stack), len(scopeStack))
+            while wellPlaced < limit and stack[wellPlaced] == scopeStack[wellPlaced]:
+                wellPlaced += 1
+            for block in stack[wellPlaced:]:
+                heuristicCost += ord(block) - ord('a') + 1
+            if heuristicCost >= bound:
+                break
 
-    while len(open) > 0:
-        currentNode = open.pop(0)
-        closed.append(currentNode)
+        return heuristicCost
 
-        if graph.testScope(currentNode):
-            print("Solution!")
-            currentNode.printPath(printLength=True, printCost=True)
-            print("================================\n")
-            return
+    def admissibleHeuristic3(self, nodeInfo):
+        """Asemanator cu 2, dar un bloc este considerat la locul lui doar daca
+        si toate blocurile de sub el sunt la locul lor. Un bloc care se afla
+        deasupra unui bloc mutat din loc va trebui si el mutat cel putin o data
+        (pentru a elibera blocul de sub el), deci adunam si costul lui.
 
-        succ = graph.generateSuccessors(currentNode, heuristicType)
-        succCopy = succ.copy()
-
-        # we insert each new node in the correct position in order to keep the open queue sorted, based on the minimum approximate cost of the path to a scope
-        for s in succCopy:
-            foundInOpenQueue = False
-            for el in open:
-                if s.info == el.info:
-                    foundInOpenQueue = True
-
-                    # if the new found path has a better approximation, we want to replace the node already in the open queue
-                    if s.pathCost < el.pathCost:
-                        open.remove(el)
-                    # else we dont want to add the current successor to the open queue, since we already have it with a better approximation
-                    else:
-                        succ.remove(s)
-                    break
+        Fiecare bloc numarat de euristica 2 este numarat si aici, deci estimarea
+        este cel putin la fel de buna, si ramane admisibila (fiecare bloc numarat
+        trebuie mutat cel putin o data, iar o mutare muta un singur bloc).
+        """
+        heuristicCost = math.inf
 
-            # if we haven't found the node in the open queue, we are going to look for it in the closed queue
-            if not foundInOpenQueue:
-                for el in closed:
-                    if s.info == el.info:
-                        # if the new found path has a better approximation, we want to remove the node from the closed queue since we want to recalculate the paths
-                        if s.pathCost < el.pathCost:
-                            closed.remove(el)
-                        # else we dont want to add the current node to the open queue, since we already have it with a better approximation
-                        else:
-                            succ.remove(s)
-                        break
-
-        for s in succ:
-            i = 0
-            while i < len(open):
-                if open[i].pathCost >= s.pathCost:
-                    break
-                i += 1
-            open.insert(i, s)
+        for scope in self.scopes:
+            heuristicCost = min(heuristicCost, self.calculateHeuristicCost3(nodeInfo, scope, heuristicCost))
+            if heuristicCost == 0:
+                break
 
+        return heuristicCost
 
-with open("blocks.txt") as fin:
-    data = fin.read()
 
-g = Graph(data)
+def aStarSearch(graph, heuristicType):
+    """A* without any output, for callers that process the solution themselves (see Search.aStar)
+
+    Args:
+        graph (Graph)
+        heuristicType (String)
+
+    Returns:
+        (Node, int): The solution node (or None if there is no solution) and the number of expanded nodes
+    """
+    stats = SearchStats()
+    solution = next(Search.aStar(graph, heuristicType, stats), None)
+    return (solution.node if solution is not None else None), stats.expandedNodes
+
+
+def aStar(graph, heuristicType, stats=None):
+    Search.printSolutions(Search.aStar(graph, heuristicType, stats), 1, printCost=True, pause=False)
+
+
+def anytimeAStarSearch(graph, heuristicType="euristica_admisibila_2", timeLimit=None, initialWeight=3.0,
+                       weightStep=0.5, stats=None):
+    """Anytime repairing A* (ARA*): a sequence of weighted A* searches, f = g + weight * h, with decreasing weights.
+
+    A high weight makes the search greedy, so a first solution is found quickly; then the weight is lowered and
+    the search goes on from where it stopped instead of starting over: the best known cost of every state is kept,
+    and the states that got a cheaper path after they were expanded (in the current search) are put aside and
+    expanded again by the next one. With an admissible heuristic, a solution found with weight w costs at most w
+    times the optimal cost; the bound yielded with a solution is min(weight, cost / the minimum g + h of the
+    nodes that are not expanded yet), which is often tighter. When the weight reaches 1 the solution is optimal.
+
+    Args:
+        graph (Graph)
+        heuristicType (String): An admissible heuristic
+        timeLimit (float): The number of seconds after which the search stops, no limit if not given
+        initialWeight (float): The weight of the first search
+        weightStep (float): How much the weight is lowered after each search
+        stats (SearchStats)
+
+    Yields:
+        (Node, float): Each improved solution, with the bound of its cost relative to the optimal cost (1 if optimal)
+    """
+    stats = stats if stats is not None else SearchStats()
+    deadline = None if timeLimit is None else time.perf_counter() + timeLimit
+    insertionIndex = itertools.count()
+    startNode = graph.nodeClass(graph.start, None, 0, graph.calcHeuristic(graph.start, heuristicType))
+    if graph.testScope(startNode):
+        stats.solutionsFound += 1
+        yield startNode, 1.0
+        return
+
+    # the node with the cheapest known path of each state
+    best = {graph.start: startNode}
+    # the nodes waiting to be expanded by the current search, and the ones waiting for the next search
+    open = {graph.start: startNode}
+    incons = {}
+    goal = None
+    goalCost = math.inf
+    weight = initialWeight
+    lastYielded = (math.inf, math.inf)
+
+    while True:
+        # the waiting nodes get the keys of the new weight and the states can be expanded again
+        open.update(incons)
+        incons = {}
+        closed = set()
+        # the heap holds (g + weight * h, -g, -insertionIndex, node), outdated entries are skipped when popped
+        queue = [(n.cost + weight * n.heuristic, -n.cost, -next(insertionIndex), n) for n in open.values()]
+        heapq.heapify(queue)
+
+        while queue and queue[0][0] < goalCost:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            currentNode = heapq.heappop(queue)[3]
+            currentInfo = currentNode.info
+            if open.get(currentInfo) is not currentNode:
+                continue
+            del open[currentInfo]
+            closed.add(currentInfo)
+
+            for s in Search.expand(graph, currentNode, heuristicType, stats):
+                info = s.info
+                known = best.get(info)
+                if known is not None and known.cost <= s.cost:
+                    stats.duplicatesPruned += 1
+                    continue
+                best[info] = s
+                if graph.testScope(s):
+                    # another scope state reached on a costlier path doesn't replace the solution:
+                    # the pruning and the bound rely on goalCost never growing
+                    if s.cost < goalCost:
+                        goal, goalCost = s, s.cost
+                    continue
+                # with an admissible heuristic, a path that can't be cheaper than the solution is not kept
+                if s.cost + s.heuristic >= goalCost:
+                    open.pop(info, None)
+                    incons.pop(info, None)
+                    continue
+                if info in closed:
+                    incons[info] = s
+                    stats.reopenedNodes += 1
+                else:
+                    open[info] = s
+                    heapq.heappush(queue, (s.cost + weight * s.heuristic, -s.cost, -next(insertionIndex), s))
+            if len(open) + len(incons) > stats.maxFrontierSize:
+                stats.maxFrontierSize = len(open) + len(incons)
+
+        if goal is None:
+            # the whole graph was searched without reaching a scope state
+            return
 
-aStar(g, "euristica_admisibila_2")
+        lowerBound = min((n.cost + n.heuristic for n in itertools.chain(open.values(), incons.values())),
+                         default=math.inf)
+        bound = max(1.0, min(weight, goalCost / lowerBound if lowerBound > 0 else weight))
+        if (goalCost, bound) < lastYielded:
+            lastYielded = (goalCost, bound)
+            stats.solutionsFound += 1
+            yield goal, bound
+        if bound == 1.0:
+            return
+        # a weight above the current bound wouldn't find anything better
+        weight = max(1.0, min(weight - weightStep, bound))
+
+
+def anytimeAStar(graph, heuristicType, timeLimit, stats=None):
+    """Prints the solutions of anytimeAStarSearch as they are improved, until the time limit"""
+    for solution, bound in anytimeAStarSearch(graph, heuristicType, timeLimit, stats=stats):
+        print(f"Solution (at most {bound:.2f} times the optimal cost)!")
+        solution.printPath(printLength=True, printCost=True)
+        print("================================\n")
+
+
+def bidirectionalAStar(graph, heuristicType):
+    """A* from the start state and from all the scope states at the same time, meeting in the middle
+    (see Bidirectional.bidirectionalSearch). Prints the solution and the counters of each direction
+    """
+    solution, forwardStats, backwardStats = Bidirectional.bidirectionalSearch(graph, heuristicType)
+    if solution is not None:
+        print("Solution!")
+        solution.printPath(printLength=True, printCost=True)
+        print("================================\n")
+    print(f"forward: {forwardStats}\nbackward: {backwardStats}")
+
+
+class BoundedEntry:
+    """A node kept in memory by smaStar, together with the bookkeeping of the memory bounded search
+
+    The successors of an entry are generated one at a time, in passes over the list returned by generateSuccessors:
+    the first pass generates all of them, the next ones regenerate only those that were dropped in the meantime.
+
+    Attributes:
+        node (Node)
+        parent (BoundedEntry)
+        depth (int): The number of moves from the start node
+        f (float): The approximate cost of the node, backed up from its successors (see backedUpCost)
+        children ([BoundedEntry]): The successors kept in memory
+        forgottenCost (float): The minimum approximate cost of the successors that were dropped (math.inf if none)
+        cursor (int): The index of the next successor of the current pass, None if no pass is in progress
+        passCost (float): A lower bound of the approximate costs of the successors not generated yet in the current pass
+        expanded (bool): True if the successors were generated at least once
+        inMemory (bool): False after the entry was dropped
+    """
+    __slots__ = ('node', 'parent', 'depth', 'f', 'children', 'forgottenCost', 'cursor', 'passCost', 'expanded',
+                 'inMemory')
+
+    def __init__(self, node, parent, f):
+        self.node = node
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.f = f
+        self.children = []
+        self.forgottenCost = math.inf
+        self.cursor = 0
+        self.passCost = f
+        self.expanded = False
+        self.inMemory = True
+
+    def openCost(self):
+        """The cost under which the entry is kept in the open queue: the lower bound of the successors it can still
+        generate (the ones not generated yet in the current pass and the dropped ones)"""
+        return min(self.passCost if self.cursor is not None else math.inf, self.forgottenCost)
+
+    def backedUpCost(self):
+        return min([child.f for child in self.children] + [self.openCost()])
+
+
+def smaStar(graph, heuristicType, maxNodes):
+    """Simplified memory bounded A* (SMA*): an A* that keeps at most maxNodes nodes in memory.
+
+    The most promising node (the minimum approximate cost, the deepest one on ties) generates a single successor
+    at a time. When the limit is exceeded, the worst leaf (the largest approximate cost, the shallowest one on ties)
+    is dropped and its parent remembers the cost of the dropped successor. The approximate costs are backed up from
+    the successors to their parents, so a parent whose successors were dropped regenerates them only when it
+    becomes the most promising node again. Besides the maxNodes nodes, only the successors of the last expanded node
+    are kept. The solution is optimal whenever the optimal path fits in the memory (at most maxNodes nodes,
+    the start node included), otherwise None is returned.
+
+    Args:
+        graph (Graph)
+        heuristicType (String): An admissible heuristic
+        maxNodes (int): The maximum number of nodes kept in memory
+
+    Returns:
+        (Node, int, int): The solution node (or None), the number of expanded nodes (the times the successors of
+            a node were generated) and the number of regenerated nodes
+    """
+    insertionIndex = itertools.count()
+    startNode = graph.nodeClass(graph.start, None, 0, graph.calcHeuristic(graph.start, heuristicType))
+    if graph.testScope(startNode):
+        return startNode, 0, 0
+    if maxNodes < 2:
+        # there is no room for a successor of the start node
+        return None, 0, 0
+
+    root = BoundedEntry(startNode, None, startNode.pathCost)
+    # the open queue holds (cost, -depth, -insertionIndex, entry): the cheapest first, the deepest one on ties
+    # the leaves queue holds (-cost, depth, insertionIndex, entry): the most expensive first, the shallowest one on ties
+    # outdated entries are not removed from the heaps, they are skipped when popped (and dropped by compact)
+    open = [(root.openCost(), 0, 0, root)]
+    leaves = []
+    # the best entry kept in memory for each state, so that successors reached on worse paths are not added again
+    entries = {graph.start: root}
+    nodesInMemory = 1
+    expandedNodes = 0
+    regeneratedNodes = 0
+    # the successors of the last expanded entry, which usually generates its next successor right after
+    lastExpanded, lastSuccessors = None, None
+
+    def pushOpen(entry):
+        cost = entry.openCost()
+        if cost != math.inf:
+            heapq.heappush(open, (cost, -entry.depth, -next(insertionIndex), entry))
+
+    def backUp(entry):
+        """Updates the cost of the entry and of its ancestors from the costs of their successors"""
+        while entry is not None:
+            f = entry.backedUpCost()
+            if f == entry.f:
+                return
+            entry.f = f
+            if not entry.children and entry is not root:
+                heapq.heappush(leaves, (-f, entry.depth, next(insertionIndex), entry))
+            entry = entry.parent
+
+    def compact(heap, isCurrent):
+        """Rebuilds the heap with only the current item of each entry in memory, since the outdated items
+        keep the nodes of the dropped entries alive"""
+        best = {}
+        for item in heap:
+            entry = item[3]
+            if entry.inMemory and isCurrent(item) and (id(entry) not in best or item < best[id(entry)]):
+                best[id(entry)] = item
+        heap[:] = best.values()
+        heapq.heapify(heap)
+
+    def dropWorstLeaf():
+        # the root has a successor in memory, so there is at least one leaf besides it
+        while True:
+            negF, depth, _, entry = heapq.heappop(leaves)
+            if entry.inMemory and not entry.children and -negF == entry.f and entry is not root:
+                break
+        entry.inMemory = False
+        if entries.get(entry.node.info) is entry:
+            del entries[entry.node.info]
+        parent = entry.parent
+        parent.children.remove(entry)
+        if entry.f < parent.forgottenCost:
+            parent.forgottenCost = entry.f
+            pushOpen(parent)
+        backUp(parent)
+        if not parent.children and parent is not root:
+            heapq.heappush(leaves, (-parent.f, parent.depth, next(insertionIndex), parent))
+
+    while len(open) > 0 and root.f != math.inf:
+        cost, _, _, entry = heapq.heappop(open)
+        if not entry.inMemory or cost != entry.openCost():
+            continue
+
+        if graph.testScope(entry.node):
+            return entry.node, expandedNodes, regeneratedNodes
+
+        if entry.cursor is None:
+            # a new pass regenerates the dropped successors, whose costs were at least forgottenCost
+            entry.cursor = 0
+            entry.passCost = entry.forgottenCost
+            entry.forgottenCost = math.inf
+        if lastExpanded is not entry:
+            lastExpanded, lastSuccessors = entry, graph.generateSuccessors(entry.node, heuristicType)
+            expandedNodes += 1
+
+        # the next successor of the pass that is not in memory yet
+        child = None
+        while child is None and entry.cursor < len(lastSuccessors):
+            s = lastSuccessors[entry.cursor]
+            entry.cursor += 1
+            if any(c.node.info == s.info for c in entry.children):
+                continue
+            # the state is already in memory on a path that is at least as good (if that entry is dropped,
+            # its parent remembers it and the state is reached again on the better path)
+            duplicate = entries.get(s.info)
+            if duplicate is not None and duplicate.node.cost <= s.cost and duplicate.depth <= entry.depth + 1:
+                continue
+            child = BoundedEntry(s, entry, max(s.pathCost, entry.passCost))
+            if entry.expanded:
+                regeneratedNodes += 1
+        if entry.cursor >= len(lastSuccessors):
+            entry.cursor = None
+            entry.expanded = True
+            lastExpanded, lastSuccessors = None, None
+
+        if child is not None:
+            if child.depth >= maxNodes - 1 and not graph.testScope(child.node):
+                # a path that doesn't fit in the memory can't be completed
+                child.f = child.passCost = math.inf
+            entries[child.node.info] = child
+            entry.children.append(child)
+            nodesInMemory += 1
+            pushOpen(child)
+            heapq.heappush(leaves, (-child.f, child.depth, next(insertionIndex), child))
+        pushOpen(entry)
+        backUp(entry)
+
+        while nodesInMemory > maxNodes:
+            dropWorstLeaf()
+            nodesInMemory -= 1
+
+        # at most maxNodes items of each heap are current, so the memory stays bounded by the limit
+        if len(open) > 2 * maxNodes:
+            compact(open, lambda item: item[0] == item[3].openCost())
+        if len(leaves) > 2 * maxNodes:
+            compact(leaves, lambda item: -item[0] == item[3].f and not item[3].children and item[3] is not root)
+
+    return None, expandedNodes, regeneratedNodes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stats", action="store_true", help="print the progress, the counters and the timings of the search")
+    parser.add_argument("--profile", action="store_true", help="run the search under cProfile")
+    args = parser.parse_args()
+
+    with open("blocks.txt") as fin:
+        data = fin.read()
+
+    g = Graph(data)
+
+    with instrumentRun(g, stats=args.stats, profile=args.profile) as stats:
+        aStar(g, "euristica_admisibila_2", stats)
+
+        # on a machine with several cores the search can be split among worker processes, each state being owned by one of them
+        # from libs.TraversalTree.ParallelAStar import parallelAStar
+        # solution, expandedNodes = parallelAStar(g, "euristica_admisibila_2", workers=4)
+        # solution.printPath(printLength=True, printCost=True)
+
+        # when the time is limited, ARA* finds a first solution quickly and then improves it until the time limit
+        # anytimeAStar(g, "euristica_admisibila_2", timeLimit=5, stats=stats)
+
+        # the search can also start from all the scope states at once and meet the forward search in the middle
+        # bidirectionalAStar(g, "euristica_admisibila_2")
+
+        # when the memory is limited, SMA* keeps at most the given number of nodes and regenerates the dropped ones if needed
+        # solution, expandedNodes, regeneratedNodes = smaStar(g, "euristica_admisibila_2", maxNodes=1000)
+        # solution.printPath(printLength=True, printCost=True)
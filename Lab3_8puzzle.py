@@ -1,10 +1,18 @@
-import copy
+import argparse
+import math
 
 from libs.TraversalTree.Node import Node as AbstractNode
+from libs.TraversalTree.CompactNode import CompactNode as AbstractCompactNode
 from libs.TraversalTree.Graph import Graph as AbstractGraph
+from libs.TraversalTree import Search
+from libs.TraversalTree.Instrumentation import instrumentRun
+from libs.TraversalTree.State import State
+from libs.PatternDatabase.AdditivePatternDatabase import AdditivePatternDatabase
+from libs.PatternDatabase.DistanceTable import DistanceTable
 
 '''
-Node.info = [[a, b, c], [d, e, 0], [g, h, i]]
+The board can be NxN, e.g. for N = 3:
+Node.info = State([[a, b, c], [d, e, 0], [g, h, i]])
           = -------
             |a|b|c|
             -------
@@ -16,13 +24,21 @@ Node.info = [[a, b, c], [d, e, 0], [g, h, i]]
 
 
 class Node(AbstractNode):
+    def getBoard(self):
+        """Returns the board of the current node as a matrix of tile labels"""
+        return self.info
+
     def __str__(self):
         s = ""
-        for line in self.info:
-            line = [x if x != '0' else ' ' for x in line]
-            s += '-------\n'
+        board = self.getBoard()
+        # every cell is as wide as the longest label, so boards with two-digit tiles stay aligned
+        cellWidth = max(len(x) for line in board for x in line)
+        separator = '-' * (len(board) * (cellWidth + 1) + 1)
+        for line in board:
+            line = [x.rjust(cellWidth) if x != '0' else ' ' * cellWidth for x in line]
+            s += separator + '\n'
             s += f'|{"|".join(line)}|\n'
-        s += '-------\n'
+        s += separator + '\n'
         s += f"Heuristic cost: {self.heuristic}"
         return s
 
@@ -35,13 +51,71 @@ def getPosInMatrix(mat, elem):
     return - 1
 
 
+class CompactNode(AbstractCompactNode):
+    """A Node that uses __slots__ and stores only the direction in which the empty cell was moved instead of the board.
+    To use it, set graph.nodeClass = CompactNode
+    """
+    __slots__ = ()
+
+    getBoard = Node.getBoard
+    __str__ = Node.__str__
+
+    @staticmethod
+    def applyMove(info, move):
+        dl, dc = move
+        emptyLine, emptyCol = getPosInMatrix(info, '0')
+        newInfo = info.toLists()
+        newInfo[emptyLine][emptyCol] = newInfo[emptyLine + dl][emptyCol + dc]
+        newInfo[emptyLine + dl][emptyCol + dc] = '0'
+        return State(newInfo)
+
+    @staticmethod
+    def undoMove(info, move):
+        dl, dc = move
+        return CompactNode.applyMove(info, (-dl, -dc))
+
+
 class Graph(AbstractGraph):
+    nodeClass = Node
+    # when True, every incrementally updated heuristic is checked against a full recomputation
+    checkHeuristicDeltas = False
+    # the heuristics that can be passed to the searches (see AbstractGraph.getHeuristic)
+    heuristics = {
+        "euristica_banala": "basicHeuristic",
+        "euristica_admisibila_1": "admissibleHeuristic1",
+        "euristica_admisibila_2": "admissibleHeuristic2",
+        "euristica_pdb": "patternDatabaseHeuristic",
+        "euristica_exacta": "exactHeuristic",
+    }
+    # the pattern database heuristic is recalculated for every node and sums several table lookups, so it is memoized
+    # (the other ones are updated incrementally from the parent's heuristic or are a single lookup)
+    memoizedHeuristics = frozenset({"euristica_pdb"})
+    # the additive pattern database used by "euristica_pdb" (see loadPatternDatabase)
+    patternDatabase = None
+    # the exact distances of all the 3x3 states, used by "euristica_exacta" (see loadDistanceTable)
+    distanceTable = None
+
     def __init__(self, data):
-        self.start = [line.split() for line in data.split('\n')]
-        self.scopes = [[["1", "2", "3"], ["4", "5", "6"], ["7", "8", "0"]]]
+        """The board can have any size NxN, the scope state being the tiles 1 .. N*N-1 in order, followed by the empty cell
+
+        Args:
+            data (str): N lines of N tiles each, 0 being the empty cell
+        """
+        self.start = State(line.split() for line in data.strip().split('\n'))
+        self.width = len(self.start)
+        if any(len(line) != self.width for line in self.start):
+            raise Exception("The board must be a square")
+        cells = [str(k) for k in range(1, self.width * self.width)] + ["0"]
+        self.scopes = [State(cells[i:i + self.width] for i in range(0, len(cells), self.width))]
+        self.scopesSet = frozenset(self.scopes)
+        # goalPositions[tile] = (line, column) of the tile in the scope state
+        self.goalPositions = {}
+        for i, line in enumerate(self.scopes[0]):
+            for j, elem in enumerate(line):
+                self.goalPositions[elem] = (i, j)
 
     def testScope(self, currentNode):
-        return currentNode.info in self.scopes
+        return currentNode.info in self.scopesSet
 
     def existsSolution(self, nodeInfo):
         """Returneaza True sau False daca starea data de infoNod corespunde
@@ -57,13 +131,19 @@ class Graph(AbstractGraph):
         Existenta solutiei depinde de nr. de inversiuni ale permutarii.
 
         DE CE?
+        A horizontal move doesn't change the permutation. A vertical move takes a tile over the other N - 1 tiles
+        of its line, so it changes the number of inversions by N - 1 +/- 2k. For an odd N that is an even number,
+        so the parity of the inversions never changes and it has to be even, like in the scope state.
+        For an even N every vertical move flips the parity of the inversions and it also moves the empty cell
+        one line up or down, so the parity of (inversions + the line of the empty cell, counted from the bottom)
+        never changes and it has to be odd, like in the scope state (0 inversions, empty cell on the last line).
         """
         lst = []
         for line in nodeInfo:
             for elem in line:
-                lst.append(elem)
+                lst.append(int(elem))
 
-        lst = [x for x in lst if x != '0']
+        lst = [x for x in lst if x != 0]
 
         inversionCount = 0
         for i, x in enumerate(lst):
@@ -71,78 +151,149 @@ class Graph(AbstractGraph):
                 if x > y:
                     inversionCount += 1
 
-        if inversionCount % 2 == 0:
-            return True
-        return False
+        width = len(nodeInfo)
+        if width % 2 == 1:
+            return inversionCount % 2 == 0
+
+        emptyLine, _ = getPosInMatrix(nodeInfo, '0')
+        return (inversionCount + width - emptyLine) % 2 == 1
 
     def generateSuccessors(self, currentNode, heuristicType):
         lstSucc = []
-        dir = [[-1, 0], [1, 0], [0, -1], [0, 1]]
+        dir = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 
         emptyLine, emptyCol = getPosInMatrix(currentNode.info, '0')
-        for dl, dc in dir:
+        for move in dir:
+            dl, dc = move
             newLine, newCol = (emptyLine + dl, emptyCol + dc)
             try:
                 if newLine < 0 or newCol < 0:
                     continue
-                newInfo = copy.deepcopy(currentNode.info)
-                newInfo[emptyLine][emptyCol] = newInfo[newLine][newCol]
+                newInfo = currentNode.info.toLists()
+                tile = newInfo[newLine][newCol]
+                newInfo[emptyLine][emptyCol] = tile
                 newInfo[newLine][newCol] = '0'
+                newInfo = State(newInfo)
 
                 if not currentNode.containsInPath(newInfo):
                     lstSucc.append(
-                        Node(
+                        self.nodeClass(
                             newInfo,
                             currentNode,
                             currentNode.cost + 1,
-                            self.calcHeuristic(newInfo, heuristicType)
+                            self.updateHeuristic(
+                                currentNode.heuristic, newInfo, tile, (newLine, newCol), (emptyLine, emptyCol), heuristicType),
+                            move
                         )
                     )
             except IndexError:
                 pass
         return lstSucc
 
-    def calcHeuristic(self, nodeInfo, heuristicType):
-        """Given a node's info and an heuristic type we calculate the heuristic for the current node
+    def heuristicDelta(self, tile, oldPosition, newPosition, heuristicType):
+        """Calculates how much the heuristic changes when a single tile is moved
 
         Args:
-            nodeInfo (Node.info)
-            heuristicType (String): The heuristic to be used for calculations
+            tile (str): The moved tile
+            oldPosition ((int, int)): The position of the tile before the move
+            newPosition ((int, int)): The position of the tile after the move
+            heuristicType (String)
 
         Returns:
-            Int: The heuristic value for the current node
+            Int: The difference between the heuristic after and before the move, or None if the heuristic can't be updated incrementally
         """
-        if heuristicType == "euristica_banala":
-            return self.basicHeuristic(nodeInfo)
-        elif heuristicType == "euristica_admisibila_1":
-            return self.admissibleHeuristic1(nodeInfo)
+        iInScope, jInScope = self.goalPositions[tile]
+        if heuristicType == "euristica_admisibila_1":
+            return (newPosition != (iInScope, jInScope)) - (oldPosition != (iInScope, jInScope))
         elif heuristicType == "euristica_admisibila_2":
-            return self.admissibleHeuristic2(nodeInfo)
-        else:
-            raise Exception("Unknown heuristic type")
+            return abs(newPosition[0] - iInScope) + abs(newPosition[1] - jInScope) \
+                - abs(oldPosition[0] - iInScope) - abs(oldPosition[1] - jInScope)
+        return None
+
+    def updateHeuristic(self, parentHeuristic, nodeInfo, tile, oldPosition, newPosition, heuristicType):
+        """Calculates the heuristic of a successor from the heuristic of its parent, knowing that a single tile was moved
+
+        Args:
+            parentHeuristic (Int): The heuristic of the parent, for the same heuristic type
+            nodeInfo (Node.info): The successor's info
+            tile: The moved tile
+            oldPosition: The position of the tile before the move
+            newPosition: The position of the tile after the move
+            heuristicType (String)
+
+        Returns:
+            Int: The heuristic value for the successor
+        """
+        delta = self.heuristicDelta(tile, oldPosition, newPosition, heuristicType)
+        if delta is None:
+            return self.calcHeuristic(nodeInfo, heuristicType)
+
+        heuristic = parentHeuristic + delta
+        if self.checkHeuristicDeltas:
+            expected = self.calcHeuristic(nodeInfo, heuristicType)
+            if heuristic != expected:
+                raise Exception(
+                    f"Incremental heuristic {heuristic} differs from the recalculated one {expected} for {nodeInfo}")
+        return heuristic
 
     def basicHeuristic(self, nodeInfo):
-        return 0 if nodeInfo in self.scopes else 1
+        return 0 if nodeInfo in self.scopesSet else 1
 
     def admissibleHeuristic1(self, nodeInfo):
         cost = 0
-        for i in range(3):
-            for j in range(3):
+        for i in range(self.width):
+            for j in range(self.width):
                 if nodeInfo[i][j] != '0' and (nodeInfo[i][j] != self.scopes[0][i][j]):
                     cost += 1
         return cost
 
     def admissibleHeuristic2(self, nodeInfo):
         cost = 0
-        for i in range(3):
-            for j in range(3):
+        for i in range(self.width):
+            for j in range(self.width):
                 if nodeInfo[i][j] == '0':
                     continue
-                iInScope, jInScope = getPosInMatrix(
-                    self.scopes[0], nodeInfo[i][j])
+                iInScope, jInScope = self.goalPositions[nodeInfo[i][j]]
                 cost += abs(i - iInScope) + abs(j - jInScope)
         return cost
 
+    def getCells(self, nodeInfo):
+        """Returns the tiles of the board as a list of ints, line by line"""
+        return [int(elem) for line in nodeInfo for elem in line]
+
+    def loadPatternDatabase(self, directory):
+        """Memory-maps the pattern databases saved in the directory, to be used by "euristica_pdb".
+        They can be built with: python -m libs.PatternDatabase.AdditivePatternDatabase DIRECTORY --width N
+        """
+        patternDatabase = AdditivePatternDatabase.load(directory)
+        if not patternDatabase.matches(self.width, self.getCells(self.scopes[0])):
+            raise Exception(f"The pattern databases from {directory} were built for a different board")
+        self.patternDatabase = patternDatabase
+
+    def patternDatabaseHeuristic(self, nodeInfo):
+        """The sum of the values of disjoint pattern databases. It is admissible and at least as good as the manhattan distance"""
+        if self.patternDatabase is None:
+            # if no databases were loaded they are built in memory, on first use
+            self.patternDatabase = AdditivePatternDatabase.build(self.width, self.getCells(self.scopes[0]))
+        return self.patternDatabase.heuristic(self.getCells(nodeInfo))
+
+    def loadDistanceTable(self, path):
+        """Memory-maps the distance table saved in the file, to be used by "euristica_exacta" and solveWithDistanceTable.
+        It can be built with: python -m libs.PatternDatabase.DistanceTable FILE
+        """
+        distanceTable = DistanceTable.load(path)
+        if distanceTable.goal != self.getCells(self.scopes[0]):
+            raise Exception(f"The distance table from {path} was built for a different goal")
+        self.distanceTable = distanceTable
+
+    def exactHeuristic(self, nodeInfo):
+        """The exact distance to the scope state, read from the distance table (math.inf if it can't be reached)"""
+        if self.distanceTable is None:
+            # if no table was loaded it is built in memory, on first use (a few seconds)
+            self.distanceTable = DistanceTable.build(self.getCells(self.scopes[0]))
+        distance = self.distanceTable.distance(self.getCells(nodeInfo))
+        return math.inf if distance is None else distance
+
     def __repr__(self):
         s = ""
         s += f"Start state:\n{self.start.__repr__()}\n"
@@ -153,44 +304,253 @@ class Graph(AbstractGraph):
         return s
 
 
-def aStar(graph, numOfSolutions, heuristicType):
+'''
+Packed state engine: the whole board is stored in a single integer, 4 bits per cell.
+The lowest 4 bits hold the position of the empty cell and cell k (counted from top-left, line by line)
+is stored in bits [4 * (k + 1), 4 * (k + 2)):
+
+Node.info = 0x_i_h_g_0_e_d_c_b_a_5   (the empty cell is cell 5)
+
+Every cell except the empty one holds a non-zero tile, so the number of cells (and the board width)
+can be recovered from the integer alone.
+'''
+
+
+def packState(nodeInfo):
+    """Packs a board given as a matrix of tile labels into an integer"""
+    cells = [int(x) for line in nodeInfo for x in line]
+    packed = cells.index(0)
+    for k, tile in enumerate(cells):
+        packed |= tile << (4 * (k + 1))
+    return packed
+
+
+def unpackState(packed):
+    """Unpacks an integer board into a State of tile labels"""
+    cells = []
+    rest = packed >> 4
+    while rest:
+        cells.append(rest & 15)
+        rest >>= 4
+    # the trailing empty cell leaves no bits set
+    while len(cells) <= packed & 15:
+        cells.append(0)
+
+    width = math.isqrt(len(cells))
+    return State([str(tile) for tile in cells[i:i + width]] for i in range(0, len(cells), width))
+
+
+class PackedNode(Node):
+    def getBoard(self):
+        return unpackState(self.info)
+
+
+class PackedGraph(Graph):
+    """A drop-in replacement for Graph that stores the boards as packed integers (see packState).
+
+    The empty cell is moved using precomputed tables (the neighbours of each cell and the bit shift of each cell),
+    so a successor is built with a few integer operations, and the heuristics are computed from per-tile lookup tables.
+    """
+    nodeClass = PackedNode
+
+    def __init__(self, data):
+        super().__init__(data)
+        width = self.width
+        cellsCount = width * width
+        if cellsCount > 16:
+            raise Exception("A packed board can have at most 16 cells")
+
+        # the order of the neighbours is the same as the order of the directions in Graph.generateSuccessors
+        self.neighbours = []
+        for k in range(cellsCount):
+            line, col = divmod(k, width)
+            self.neighbours.append(tuple(
+                (line + dl) * width + col + dc
+                for dl, dc in [[-1, 0], [1, 0], [0, -1], [0, 1]]
+                if 0 <= line + dl < width and 0 <= col + dc < width
+            ))
+        self.shifts = [4 * (k + 1) for k in range(cellsCount)]
+
+        # misplacedTable[tile][k] / manhattanTable[tile][k] = the heuristic contribution of the tile when it is placed in cell k
+        self.misplacedTable = [[0] * cellsCount for _ in range(16)]
+        self.manhattanTable = [[0] * cellsCount for _ in range(16)]
+        for label, (iInScope, jInScope) in self.goalPositions.items():
+            tile = int(label)
+            if tile == 0:
+                continue
+            for k in range(cellsCount):
+                i, j = divmod(k, width)
+                self.misplacedTable[tile][k] = int((i, j) != (iInScope, jInScope))
+                self.manhattanTable[tile][k] = abs(i - iInScope) + abs(j - jInScope)
+
+        self.start = packState(self.start)
+        self.scopes = [packState(scope) for scope in self.scopes]
+        self.scopesSet = frozenset(self.scopes)
+
+    def existsSolution(self, nodeInfo):
+        return super().existsSolution(unpackState(nodeInfo))
+
+    def generateSuccessors(self, currentNode, heuristicType):
+        lstSucc = []
+        state = currentNode.info
+        empty = state & 15
+        emptyShift = self.shifts[empty]
+
+        for cell in self.neighbours[empty]:
+            cellShift = self.shifts[cell]
+            tile = (state >> cellShift) & 15
+            # the tile moves into the empty cell and the empty cell moves to the tile's old cell
+            newState = state - (tile << cellShift) + (tile << emptyShift) - empty + cell
+
+            if not currentNode.containsInPath(newState):
+                lstSucc.append(
+                    self.nodeClass(
+                        newState,
+                        currentNode,
+                        currentNode.cost + 1,
+                        self.updateHeuristic(currentNode.heuristic, newState, tile, cell, empty, heuristicType),
+                        cell
+                    )
+                )
+        return lstSucc
+
+    def heuristicDelta(self, tile, oldCell, newCell, heuristicType):
+        if heuristicType == "euristica_admisibila_1":
+            table = self.misplacedTable
+        elif heuristicType == "euristica_admisibila_2":
+            table = self.manhattanTable
+        else:
+            return None
+        return table[tile][newCell] - table[tile][oldCell]
+
+    def getCells(self, nodeInfo):
+        return [(nodeInfo >> shift) & 15 for shift in self.shifts]
+
+    def tableHeuristic(self, state, table):
+        cost = 0
+        for k, shift in enumerate(self.shifts):
+            cost += table[(state >> shift) & 15][k]
+        return cost
+
+    def admissibleHeuristic1(self, nodeInfo):
+        return self.tableHeuristic(nodeInfo, self.misplacedTable)
+
+    def admissibleHeuristic2(self, nodeInfo):
+        return self.tableHeuristic(nodeInfo, self.manhattanTable)
+
+    def __repr__(self):
+        s = ""
+        s += f"Start state:\n{unpackState(self.start).__repr__()}\n"
+
+        s += "Scope states:\n"
+        for scope in self.scopes:
+            s += unpackState(scope).__repr__() + "\n"
+        return s
+
+
+def aStar(graph, numOfSolutions, heuristicType, stats=None):
     if not graph.existsSolution(graph.start):
         return
 
-    queue = [Node(graph.start, None, 0)]
+    Search.printSolutions(Search.treeAStar(graph, heuristicType, stats), numOfSolutions, printCost=True)
 
-    while len(queue) > 0:
-        currentNode = queue.pop(0)
 
-        if graph.testScope(currentNode):
-            print("Solution!")
-            currentNode.printPath(printLength=True, printCost=True)
-            print("================================\n")
-            numOfSolutions -= 1
-            input()
+def idaStar(graph, heuristicType):
+    """Iterative deepening A*: a series of depth first searches, each of them cut off when the approximate cost
+    of the path (pathCost) exceeds a bound. The first bound is the approximate cost of the start node and each
+    search raises the bound to the smallest approximate cost that exceeded it, so the first solution found is optimal.
 
-            if numOfSolutions == 0:
-                return
+    No open queue is kept, only the current path and the successors of its nodes, so the memory is linear
+    in the depth of the solution (which makes it usable for the 15-puzzle).
 
-        succ = graph.generateSuccessors(currentNode, heuristicType)
-
-        # we insert each new node in the correct position in order to keep the queue sorted
-        for s in succ:
-            i = 0
-            foundPos = False
-            for i in range(len(queue)):
-                if queue[i].pathCost > s.pathCost:
-                    foundPos = True
-                    break
+    Args:
+        graph (Graph)
+        heuristicType (String): An admissible heuristic
 
-            if foundPos:
-                queue.insert(i, s)
-            else:
-                queue.append(s)
+    Returns:
+        (Node, int): The solution node (or None if there is no solution) and the number of expanded nodes
+    """
+    if not graph.existsSolution(graph.start):
+        return None, 0
 
+    expandedNodes = 0
 
-with open("8puzzle.txt") as fin:
-    data = fin.read()
+    def boundedSearch(currentNode, bound):
+        """Returns the solution node (or None) and the smallest approximate cost that exceeded the bound"""
+        nonlocal expandedNodes
+        if currentNode.pathCost > bound:
+            return None, currentNode.pathCost
+        if graph.testScope(currentNode):
+            return currentNode, bound
 
-g = Graph(data)
-aStar(g, 3, "euristica_admisibila_2")
+        expandedNodes += 1
+        nextBound = math.inf
+        succ = graph.generateSuccessors(currentNode, heuristicType)
+        # the most promising successors are tried first
+        succ.sort(key=lambda s: s.pathCost)
+        for s in succ:
+            solution, exceededCost = boundedSearch(s, bound)
+            if solution is not None:
+                return solution, bound
+            nextBound = min(nextBound, exceededCost)
+        return None, nextBound
+
+    startNode = graph.nodeClass(graph.start, None, 0, graph.calcHeuristic(graph.start, heuristicType))
+    bound = startNode.pathCost
+    while bound != math.inf:
+        solution, bound = boundedSearch(startNode, bound)
+        if solution is not None:
+            return solution, expandedNodes
+
+    return None, expandedNodes
+
+
+def solveWithDistanceTable(graph):
+    """Finds an optimal solution without any search: since the heuristic is the exact distance,
+    from each node we go to a successor whose distance is smaller by one. Only for 3x3 boards.
+
+    Args:
+        graph (Graph)
+
+    Returns:
+        Node: The solution node (or None if there is no solution)
+    """
+    currentNode = graph.nodeClass(graph.start, None, 0, graph.calcHeuristic(graph.start, "euristica_exacta"))
+    if currentNode.heuristic == math.inf:
+        return None
+
+    while currentNode.heuristic > 0:
+        succ = graph.generateSuccessors(currentNode, "euristica_exacta")
+        currentNode = next(s for s in succ if s.heuristic == currentNode.heuristic - 1)
+    return currentNode
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stats", action="store_true", help="print the progress, the counters and the timings of the search")
+    parser.add_argument("--profile", action="store_true", help="run the search under cProfile")
+    args = parser.parse_args()
+
+    with open("8puzzle.txt") as fin:
+        data = fin.read()
+
+    g = Graph(data)
+    # the packed engine generates the same nodes, several times faster
+    # g = PackedGraph(data)
+    # the pattern databases for "euristica_pdb" can be prebuilt and memory-mapped, otherwise they are built on first use
+    # g.loadPatternDatabase("pdb3x3")
+    with instrumentRun(g, stats=args.stats, profile=args.profile) as stats:
+        aStar(g, 3, "euristica_admisibila_2", stats)
+
+        # on a machine with several cores the search can be split among worker processes, each state being owned by one of them
+        # from libs.TraversalTree.ParallelAStar import parallelAStar
+        # solution, expandedNodes = parallelAStar(g, "euristica_admisibila_2", workers=4)
+        # solution.printPath(printLength=True, printCost=True)
+
+        # for bigger boards (e.g. the 15-puzzle) use IDA*, its memory is linear in the depth of the solution
+        # solution, expandedNodes = idaStar(PackedGraph(data), "euristica_admisibila_2")
+        # solution.printPath(printLength=True, printCost=True)
+
+        # with the exact distances of all the 3x3 states (built once, e.g. for batch jobs) no search is needed
+        # g.loadDistanceTable("8puzzle.dist")
+        # solveWithDistanceTable(g).printPath(printLength=True, printCost=True)
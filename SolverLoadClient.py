@@ -0,0 +1,133 @@
+"""Sends a mix of quick and long requests to a SolverService and reports the latency percentiles of each kind.
+
+The requests are sent at a fixed rate (an open loop: a request doesn't wait for the previous ones to be answered),
+spread over several connections. The quick requests are 3x3 puzzles a few moves away from the goal, the long
+ones are larger blocks worlds, each kind with its own deadline (the service schedules the searches by their
+deadlines), and some requests repeat an earlier instance, so that they can be coalesced.
+The instances are generated with benchmarks.InstanceGenerators, so the same seed always sends the same requests.
+
+Usage (from the repository root, with the service running):
+    python SolverLoadClient.py [--port 8765 | --socket PATH] [--requests 200] [--rate 20] [--long 0.05] [--deadline 2]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.InstanceGenerators import generateBlocks, generatePuzzle
+
+
+def percentile(values, p):
+    """The nearest-rank percentile of the values, or None if there are none"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+
+def makeRequests(count, longFraction, duplicateFraction, deadline, longDeadline, seed):
+    """Returns (kind, request) pairs, kind being quick or long"""
+    rng = random.Random(seed)
+    requests = []
+    for i in range(count):
+        if requests and rng.random() < duplicateFraction:
+            kind, request = rng.choice(requests)
+            requests.append((kind, {**request, "id": i}))
+            continue
+        if rng.random() < longFraction:
+            kind, data = "long", generateBlocks(8, 4, 2, rng.randrange(10 ** 6))
+            request = {"domain": "blocks", "data": data, "deadline": longDeadline}
+        else:
+            kind, data = "quick", generatePuzzle(3, rng.randrange(10, 30), rng.randrange(10 ** 6))
+            request = {"domain": "puzzle", "data": data, "deadline": deadline}
+        requests.append((kind, {"id": i, **request}))
+    return requests
+
+
+async def runConnection(reader, writer, requests, interval, start, results):
+    """Sends the requests of one connection at their scheduled times and collects the responses"""
+    sent = {}
+
+    async def readResponses():
+        for _ in range(len(requests)):
+            line = await reader.readline()
+            if not line:
+                return
+            response = json.loads(line)
+            sentTime, kind = sent.pop(response["id"])
+            results.append((kind, response["status"], time.perf_counter() - sentTime))
+
+    readerTask = asyncio.create_task(readResponses())
+    for index, kind, request in requests:
+        await asyncio.sleep(max(0.0, start + index * interval - time.perf_counter()))
+        sent[request["id"]] = (time.perf_counter(), kind)
+        writer.write((json.dumps(request) + "\n").encode())
+        await writer.drain()
+    await readerTask
+
+
+async def runLoad(args):
+    requests = makeRequests(args.requests, args.long, args.duplicates, args.deadline, args.long_deadline, args.seed)
+    connections = []
+    for _ in range(args.connections):
+        if args.socket:
+            connections.append(await asyncio.open_unix_connection(args.socket))
+        else:
+            connections.append(await asyncio.open_connection(args.host, args.port))
+
+    results = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        runConnection(reader, writer,
+                      [(index, kind, request) for index, (kind, request) in enumerate(requests)
+                       if index % args.connections == c],
+                      1 / args.rate, start, results)
+        for c, (reader, writer) in enumerate(connections)
+    ))
+    elapsed = time.perf_counter() - start
+
+    # the service's own counters, e.g. how many requests were coalesced
+    reader, writer = connections[0]
+    writer.write((json.dumps({"op": "stats"}) + "\n").encode())
+    serviceStats = json.loads(await reader.readline())
+    for _, writer in connections:
+        writer.close()
+    return results, elapsed, serviceStats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="connect to a Unix socket instead of TCP")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=20, help="requests per second")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--long", type=float, default=0.05, help="the fraction of long requests")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="the fraction of requests that repeat an instance")
+    parser.add_argument("--deadline", type=float, default=2, help="seconds, for the quick requests")
+    parser.add_argument("--long-deadline", type=float, default=10, help="seconds, for the long requests")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results, elapsed, serviceStats = asyncio.run(runLoad(args))
+
+    print(f"{len(results)} responses in {elapsed:.2f}s ({len(results) / elapsed:.1f}/s)")
+    print(f"{'kind':<8}{'count':>7}{'p50':>10}{'p99':>10}{'max':>10}  statuses")
+    for kind in ["quick", "long", "all"]:
+        selected = [r for r in results if kind == "all" or r[0] == kind]
+        latencies = [latency for _, _, latency in selected]
+        if not latencies:
+            continue
+        statuses = {}
+        for _, status, _ in selected:
+            statuses[status] = statuses.get(status, 0) + 1
+        summary = ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items()))
+        print(f"{kind:<8}{len(latencies):>7}{percentile(latencies, 50):>10.3f}{percentile(latencies, 99):>10.3f}"
+              f"{max(latencies):>10.3f}  {summary}")
+    print("service:", ", ".join(f"{key}: {value}" for key, value in serviceStats.items() if key != "id"))
+
+
+if __name__ == "__main__":
+    main()
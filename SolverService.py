@@ -0,0 +1,356 @@
+"""A local service that solves blocks world and sliding puzzle instances, for other programs to use.
+
+The clients connect through localhost TCP (or a Unix socket) and send requests as JSON lines; a connection
+can have many requests in flight and every response is written as soon as it is ready, with the id of its request:
+    {"id": 1, "domain": "blocks", "data": "a\\nc b\\nstari_finale\\nb c a\\n#", "deadline": 5}
+    {"id": 1, "status": "solved", "cost": 4, "length": 4, "expansions": 12, "seconds": 0.01, "latency": 0.02, "path": [...]}
+    {"op": "cancel", "id": 1}
+    {"op": "stats"}
+The domain is blocks or puzzle, the heuristic is optional (as in BatchSolver) and the deadline is the number of
+seconds the client is willing to wait (--timeout if not given). The status is one of solved, no_solution,
+memory, error (as in BatchSolver), timeout (the deadline passed) or cancelled.
+
+Every search runs in its own forked process, at most --workers at a time, so that a search can be stopped
+as soon as nobody waits for it anymore (its deadline passed, it was cancelled or its client disconnected),
+which a process pool can't do. The searches are scheduled by their deadlines (earliest deadline first), so a few
+long searches can't starve many quick ones: when all the processes are busy and a request arrives with an earlier
+deadline than one of the running searches, the search with the latest deadline is suspended (SIGSTOP) and resumed
+(SIGCONT) when a process is free again, so its work is not lost. A suspended search keeps its memory.
+
+The identical requests (same domain, heuristic and instance) that are in flight at the same time are coalesced:
+they wait for a single search, which is stopped only when all of them left.
+
+Usage (from the repository root):
+    python SolverService.py [--port 8765 | --socket PATH] [--workers N] [--timeout 60] [--memory 1024] [--pdb DIRECTORY]
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import resource
+import signal
+import time
+
+import BatchSolver
+
+
+class Request:
+    """A request waiting for the result of a job
+
+    Attributes:
+        requestId (object): The id given by the client
+        client (Client): The connection of the request
+        deadline (float): The time (of the event loop's clock) after which the client doesn't wait anymore
+        timer (asyncio.TimerHandle): Expires the request at its deadline
+        job (Job): The search whose result the request waits for
+    """
+
+    def __init__(self, requestId, client, deadline):
+        self.requestId = requestId
+        self.client = client
+        self.deadline = deadline
+        self.received = time.perf_counter()
+        self.timer = None
+        self.job = None
+
+
+class Job:
+    """A search, shared by all the identical requests that wait for it
+
+    Attributes:
+        key (tuple): The domain, the heuristic and the normalized instance
+        requests (set): The requests that wait for the result
+        state (str): queued, running, suspended or finished
+        priority (float): The earliest deadline of the requests, the jobs are started in this order
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.requests = set()
+        self.state = "queued"
+        self.priority = None
+        self.process = None
+        self.connection = None
+
+    def updatePriority(self):
+        """Returns True if the priority changed"""
+        priority = min(request.deadline for request in self.requests) if self.requests else None
+        changed = priority != self.priority
+        self.priority = priority
+        return changed
+
+
+def runJob(connection, domain, data, heuristicType, memory):
+    """Runs one search in the forked process and sends its result through the connection"""
+    if memory:
+        limit = memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    start = time.perf_counter()
+    try:
+        result = BatchSolver.describeSolution(*BatchSolver.solve(domain, data, heuristicType))
+    except MemoryError:
+        result = {"status": "memory"}
+    except Exception as e:
+        result = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    connection.send(result)
+
+
+class Client:
+    """A connection, with the requests it has in flight"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.requests = {}
+
+    def send(self, response):
+        if not self.writer.is_closing():
+            self.writer.write((json.dumps(response) + "\n").encode())
+
+
+class SolverService:
+    """Schedules the jobs on at most `workers` processes, see the module documentation
+
+    Attributes:
+        jobs (dict): The queued and running jobs, by key
+        queue ([tuple]): Binary heap of (priority, insertionIndex, job), the outdated entries are skipped
+        running (set): The running jobs (the suspended ones are not counted)
+        counters (dict): The number of requests for each status, and of the coalesced requests
+    """
+
+    def __init__(self, workers, timeout, memory):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory = memory
+        self.context = multiprocessing.get_context("fork")
+        self.loop = None
+        self.jobs = {}
+        self.queue = []
+        self.insertionIndex = itertools.count()
+        self.running = set()
+        self.counters = {"requests": 0, "coalesced": 0}
+
+    @staticmethod
+    def makeKey(message):
+        domain = message.get("domain")
+        if domain not in BatchSolver.DEFAULT_HEURISTICS:
+            raise Exception("The domain must be one of " + ", ".join(sorted(BatchSolver.DEFAULT_HEURISTICS)))
+        data = message.get("data")
+        if not isinstance(data, str) or not data.strip():
+            raise Exception("The data of the instance is missing")
+        heuristicType = message.get("heuristic") or BatchSolver.DEFAULT_HEURISTICS[domain]
+        # the instances that differ only by whitespace are the same
+        data = "\n".join(line.strip() for line in data.strip().split("\n"))
+        return domain, heuristicType, data
+
+    def submit(self, client, message):
+        requestId = message.get("id")
+        try:
+            key = self.makeKey(message)
+            deadline = self.loop.time() + float(message.get("deadline", self.timeout))
+        except Exception as e:
+            client.send({"id": requestId, "status": "error", "error": str(e)})
+            return
+        if requestId in client.requests:
+            self.detach(client.requests[requestId])
+        self.counters["requests"] += 1
+
+        request = Request(requestId, client, deadline)
+        client.requests[requestId] = request
+        request.timer = self.loop.call_at(deadline, self.respond, request, {"status": "timeout"})
+
+        job = self.jobs.get(key)
+        if job is None:
+            job = Job(key)
+            self.jobs[key] = job
+        else:
+            self.counters["coalesced"] += 1
+        request.job = job
+        job.requests.add(request)
+        if job.updatePriority() and job.state in ("queued", "suspended"):
+            heapq.heappush(self.queue, (job.priority, next(self.insertionIndex), job))
+        self.schedule()
+
+    def respond(self, request, result):
+        """Sends the result of a request and detaches it from its job"""
+        response = {"id": request.requestId, **result,
+                    "latency": round(time.perf_counter() - request.received, 4)}
+        self.counters[result["status"]] = self.counters.get(result["status"], 0) + 1
+        request.client.send(response)
+        self.detach(request)
+
+    def detach(self, request):
+        """Removes a request from its job, the job is stopped if no other request waits for it"""
+        request.timer.cancel()
+        if request.client.requests.get(request.requestId) is request:
+            del request.client.requests[request.requestId]
+        job = request.job
+        if job is None:
+            return
+        request.job = None
+        job.requests.discard(request)
+        if not job.requests:
+            if job.state != "finished":
+                self.stopJob(job)
+                self.schedule()
+        elif job.updatePriority() and job.state in ("queued", "suspended"):
+            heapq.heappush(self.queue, (job.priority, next(self.insertionIndex), job))
+
+    def cancel(self, client, message):
+        request = client.requests.get(message.get("id"))
+        if request is not None:
+            self.respond(request, {"status": "cancelled"})
+
+    def disconnect(self, client):
+        for request in list(client.requests.values()):
+            self.detach(request)
+
+    def schedule(self):
+        """Starts (or resumes) the waiting jobs with the earliest deadlines. When all the processes are busy,
+        the running job with the latest deadline is suspended if a waiting job has an earlier one
+        """
+        while self.queue:
+            priority, _, job = self.queue[0]
+            # the entry is outdated if the job was stopped or its priority changed after it was added
+            if job.state not in ("queued", "suspended") or priority != job.priority:
+                heapq.heappop(self.queue)
+                continue
+            if len(self.running) >= self.workers:
+                latest = max(self.running, key=lambda j: j.priority)
+                if latest.priority <= priority:
+                    break
+                self.suspendJob(latest)
+            heapq.heappop(self.queue)
+            if job.state == "suspended":
+                self.resumeJob(job)
+            else:
+                self.startJob(job)
+
+    def startJob(self, job):
+        domain, heuristicType, data = job.key
+        receiver, sender = self.context.Pipe(duplex=False)
+        job.process = self.context.Process(target=runJob, args=(sender, domain, data, heuristicType, self.memory))
+        job.process.start()
+        sender.close()
+        job.connection = receiver
+        job.state = "running"
+        self.running.add(job)
+        self.loop.add_reader(receiver.fileno(), self.finishJob, job)
+
+    def suspendJob(self, job):
+        """Stops the process of a running job without losing its work, the job waits again for a free process"""
+        os.kill(job.process.pid, signal.SIGSTOP)
+        job.state = "suspended"
+        self.running.discard(job)
+        heapq.heappush(self.queue, (job.priority, next(self.insertionIndex), job))
+
+    def resumeJob(self, job):
+        os.kill(job.process.pid, signal.SIGCONT)
+        job.state = "running"
+        self.running.add(job)
+
+    def finishJob(self, job):
+        """Called when the process of a job sent its result (or died)"""
+        try:
+            result = job.connection.recv()
+        except EOFError:
+            result = {"status": "error", "error": "The search process has died"}
+        self.stopJob(job)
+        for request in list(job.requests):
+            self.respond(request, result)
+        self.schedule()
+
+    def stopJob(self, job):
+        """Removes a job, killing its process if it is still running (or suspended)"""
+        if job.state in ("running", "suspended"):
+            self.loop.remove_reader(job.connection.fileno())
+            job.connection.close()
+            if job.process.is_alive():
+                job.process.kill()
+            job.process.join()
+            self.running.discard(job)
+        job.state = "finished"
+        if self.jobs.get(job.key) is job:
+            del self.jobs[job.key]
+
+    def stats(self):
+        suspended = sum(job.state == "suspended" for job in self.jobs.values())
+        return {**self.counters, "queued": len(self.jobs) - len(self.running) - suspended,
+                "running": len(self.running), "suspended": suspended}
+
+    async def handleClient(self, reader, writer):
+        client = Client(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("a request must be a JSON object")
+                except ValueError as e:
+                    client.send({"status": "error", "error": f"Invalid request: {e}"})
+                    continue
+
+                op = message.get("op", "solve")
+                if op == "solve":
+                    self.submit(client, message)
+                elif op == "cancel":
+                    self.cancel(client, message)
+                elif op == "stats":
+                    client.send({"id": message.get("id"), "status": "stats", **self.stats()})
+                else:
+                    client.send({"id": message.get("id"), "status": "error", "error": f"Unknown op {op}"})
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.disconnect(client)
+            writer.close()
+
+    async def serve(self, host, port, socketPath=None):
+        self.loop = asyncio.get_running_loop()
+        if socketPath is not None:
+            server = await asyncio.start_unix_server(self.handleClient, path=socketPath)
+        else:
+            server = await asyncio.start_server(self.handleClient, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Serving on {addresses} with {self.workers} workers", flush=True)
+        async with server:
+            try:
+                await server.serve_forever()
+            finally:
+                for job in list(self.running):
+                    self.stopJob(job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--timeout", type=float, default=60, help="the deadline of the requests that don't give one")
+    parser.add_argument("--memory", type=int, default=1024, help="MB per search (0 for no limit)")
+    parser.add_argument("--pdb", help="the directory of the pattern databases (puzzle, euristica_pdb)")
+    parser.add_argument("--distance-table", help="the distance table file (puzzle, euristica_exacta)")
+    args = parser.parse_args()
+
+    # the searches run in processes forked from this one, so they see the options of BatchSolver.solve
+    # and the labs imported here don't have to be imported again for every search
+    BatchSolver.workerOptions.update({"pdb": args.pdb, "distanceTable": args.distance_table})
+    import Lab2_AStar_Blocks
+    import Lab3_8puzzle
+    service = SolverService(args.workers, args.timeout, args.memory)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Runs every search on a set of seeded random instances and records a baseline of the results.
+
+For each instance and search it records the status (solved, no_solution, timeout, memory, killed), the cost of
+the solution, the expanded and generated nodes, the time, the expanded nodes per second and the memory used by
+the search (the growth of the peak RSS). Every search runs in its own forked process, with a time limit and a
+memory cap, so a search that explodes doesn't affect the others.
+
+The results are written as JSON (which can be used as the baseline of a later run) and optionally as CSV.
+With --compare, the results are compared with a baseline and the regressions are listed: a different cost,
+a solved instance that is not solved anymore, more expanded nodes or fewer nodes per second (beyond --tolerance).
+
+Usage (from the repository root):
+    python -m benchmarks.BenchmarkSuite [--suite quick] [--time-limit 10] [--output baseline.json] [--csv results.csv]
+    python -m benchmarks.BenchmarkSuite --compare baseline.json
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import resource
+import signal
+import subprocess
+import sys
+import time
+
+from benchmarks.InstanceGenerators import generateBlocks, generatePuzzle
+from libs.TraversalTree import Search
+from libs.TraversalTree.SearchStats import SearchStats
+
+# blocks: (number of blocks, number of stacks, number of goals), puzzle: (width, length of the random walk)
+SUITES = {
+    "quick": {"blocks": [(5, 3, 1), (6, 3, 2)], "puzzle": [(3, 20), (3, 40)], "seeds": 2},
+    "full": {"blocks": [(5, 3, 1), (6, 4, 2), (7, 4, 1), (8, 4, 2)], "puzzle": [(3, 30), (3, 60), (4, 40)], "seeds": 5},
+}
+
+BLOCKS_SEARCHES = [
+    ("breadthFirst", None),
+    ("iterativeDepthFirst", None),
+    ("uniformCostSearch", None),
+    ("aStar", "euristica_banala"),
+    ("aStar", "euristica_admisibila_1"),
+    ("aStar", "euristica_admisibila_2"),
+    ("aStar", "euristica_admisibila_3"),
+]
+PUZZLE_SEARCHES = [
+    ("aStar", "euristica_banala"),
+    ("aStar", "euristica_admisibila_1"),
+    ("aStar", "euristica_admisibila_2"),
+    ("aStar", "euristica_pdb"),
+    ("aStar", "euristica_exacta"),
+    ("idaStar", "euristica_admisibila_2"),
+    ("idaStar", "euristica_pdb"),
+]
+# the depth limit of iterativeDepthFirst, the time limit usually stops it first
+MAX_DEPTH = 30
+# the speed of shorter searches is mostly noise, so it is not compared
+MIN_TIMED_SECONDS = 0.1
+CSV_FIELDS = ["instance", "search", "heuristic", "status", "cost", "expandedNodes", "generatedNodes",
+              "seconds", "nodesPerSecond", "memoryKB"]
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def raiseTimeout(signum, frame):
+    raise SearchTimeout()
+
+
+def generateInstances(suite):
+    """Yields (name, domain, data) for every instance of the suite"""
+    config = SUITES[suite]
+    for seed in range(config["seeds"]):
+        for numBlocks, numStacks, numGoals in config["blocks"]:
+            yield (f"blocks-{numBlocks}b{numStacks}s{numGoals}g-seed{seed}", "blocks",
+                   generateBlocks(numBlocks, numStacks, numGoals, seed))
+        for width, moves in config["puzzle"]:
+            yield f"puzzle-{width}x{width}-{moves}m-seed{seed}", "puzzle", generatePuzzle(width, moves, seed)
+
+
+def makeGraph(domain, data, search, tables):
+    if domain == "blocks":
+        if search == "aStar":
+            import Lab2_AStar_Blocks as lab
+        else:
+            import Lab1_Blocks as lab
+        return lab.Graph(data)
+
+    import Lab3_8puzzle as lab
+    graph = lab.PackedGraph(data)
+    graph.patternDatabase, graph.distanceTable = tables.get(graph.width, (None, None))
+    return graph
+
+
+def runSearch(graph, search, heuristicType, stats):
+    """Returns the solution node of the search, or None"""
+    if search == "idaStar":
+        import Lab3_8puzzle as lab
+        solution, stats.expandedNodes = lab.idaStar(graph, heuristicType)
+        return solution
+
+    if search == "iterativeDepthFirst":
+        solutions = Search.iterativeDepthFirst(graph, MAX_DEPTH, heuristicType, stats)
+    else:
+        solutions = getattr(Search, search)(graph, heuristicType=heuristicType, stats=stats)
+    solution = next(solutions, None)
+    return solution.node if solution is not None else None
+
+
+def runWorker(connection, domain, data, search, heuristicType, timeLimit, memoryMB, tables):
+    """Runs one search in the forked process and sends its result through the connection"""
+    if memoryMB:
+        limit = memoryMB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    signal.signal(signal.SIGALRM, raiseTimeout)
+
+    graph = makeGraph(domain, data, search, tables)
+    stats = SearchStats()
+    result = {"cost": None}
+    rssBefore = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    signal.setitimer(signal.ITIMER_REAL, timeLimit)
+    try:
+        solution = runSearch(graph, search, heuristicType, stats)
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        result["status"] = "solved" if solution is not None else "no_solution"
+        if solution is not None:
+            result["cost"] = solution.cost
+    except SearchTimeout:
+        result["status"] = "timeout"
+    except MemoryError:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        result["status"] = "memory"
+    elapsed = time.perf_counter() - start
+
+    result["expandedNodes"] = stats.expandedNodes
+    result["generatedNodes"] = stats.generatedNodes
+    result["seconds"] = round(elapsed, 4)
+    result["nodesPerSecond"] = round(stats.expandedNodes / elapsed) if elapsed > 0 else None
+    result["memoryKB"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rssBefore
+    connection.send(result)
+
+
+def getTables(width, tables):
+    """Builds the pattern databases (and for 3x3 the distance table) once, so that the forked searches inherit them"""
+    if width not in tables:
+        from libs.PatternDatabase.AdditivePatternDatabase import AdditivePatternDatabase
+        from libs.PatternDatabase.DistanceTable import DistanceTable
+        goal = list(range(1, width * width)) + [0]
+        distanceTable = DistanceTable.build(goal) if width == 3 else None
+        tables[width] = (AdditivePatternDatabase.build(width, goal), distanceTable)
+    return tables
+
+
+def runSuite(suite, timeLimit, memoryMB, log=sys.stderr):
+    """Runs every search on every instance of the suite
+
+    Returns:
+        [dict]: One result for each (instance, search, heuristic)
+    """
+    context = multiprocessing.get_context("fork")
+    tables = {}
+    results = []
+
+    for name, domain, data in generateInstances(suite):
+        searches = BLOCKS_SEARCHES if domain == "blocks" else PUZZLE_SEARCHES
+        width = len(data.strip().split("\n"))
+        for search, heuristicType in searches:
+            if heuristicType == "euristica_exacta" and width != 3:
+                continue
+            if heuristicType in ("euristica_pdb", "euristica_exacta"):
+                getTables(width, tables)
+
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=runWorker, args=(
+                sender, domain, data, search, heuristicType, timeLimit, memoryMB, tables))
+            process.start()
+            sender.close()
+            # the search stops itself at the time limit, the process is killed only if it doesn't
+            if receiver.poll(timeLimit + 10):
+                try:
+                    result = receiver.recv()
+                except EOFError:
+                    result = {"status": "killed"}
+            else:
+                result = {"status": "killed"}
+            process.join(1)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+            result = {"instance": name, "search": search, "heuristic": heuristicType, **result}
+            results.append(result)
+            print(f"{name:<28}{search:<21}{str(heuristicType):<24}{result['status']:<12}"
+                  f"cost={result.get('cost')} expanded={result.get('expandedNodes')} {result.get('seconds')}s", file=log)
+    return results
+
+
+def getCommit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compareResults(baseline, results, tolerance):
+    """Prints the results next to the baseline and returns the number of regressions"""
+    oldResults = {(r["instance"], r["search"], r["heuristic"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"{'instance':<28}{'search':<21}{'heuristic':<24}{'status':<24}{'cost':<16}{'expanded':<22}{'nodes/s':<10}")
+    for new in results:
+        old = oldResults.get((new["instance"], new["search"], new["heuristic"]))
+        if old is None:
+            continue
+
+        problems = []
+        if old["status"] == "solved" and new["status"] != "solved":
+            problems.append("STATUS")
+        if old["status"] == "solved" and new["status"] == "solved" and old["cost"] != new["cost"]:
+            problems.append("COST")
+        if old["status"] == new["status"] == "solved":
+            if new["expandedNodes"] > old["expandedNodes"] * tolerance:
+                problems.append("EXPANSIONS")
+            if min(old["seconds"], new["seconds"]) >= MIN_TIMED_SECONDS and \
+                    new["nodesPerSecond"] * tolerance < old["nodesPerSecond"]:
+                problems.append("SLOWER")
+        regressions += len(problems) > 0
+
+        speed = ""
+        if old.get("nodesPerSecond") and new.get("nodesPerSecond"):
+            speed = f"x{new['nodesPerSecond'] / old['nodesPerSecond']:.2f}"
+        print(f"{new['instance']:<28}{new['search']:<21}{str(new['heuristic']):<24}"
+              f"{old['status'] + ' -> ' + new['status']:<24}{str(old.get('cost')) + ' -> ' + str(new.get('cost')):<16}"
+              f"{str(old.get('expandedNodes')) + ' -> ' + str(new.get('expandedNodes')):<22}{speed:<10}"
+              f"{' '.join(problems)}")
+    print(f"{regressions} regressions (baseline {baseline['meta'].get('commit')}, tolerance {tolerance})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=sorted(SUITES), help="quick by default, or the suite of the compared baseline")
+    parser.add_argument("--time-limit", type=float, default=10, help="seconds per search")
+    parser.add_argument("--memory", type=int, default=2048, help="MB per search (0 for no limit)")
+    parser.add_argument("--output", help="the JSON file of the results")
+    parser.add_argument("--csv", help="the CSV file of the results")
+    parser.add_argument("--compare", help="a JSON file written by a previous run")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="the allowed ratio of expansions / slowdown before a result is a regression")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fin:
+            baseline = json.load(fin)
+
+    suite = args.suite or (baseline["meta"]["suite"] if baseline is not None else "quick")
+    results = runSuite(suite, args.time_limit, args.memory)
+    meta = {"suite": suite, "timeLimit": args.time_limit, "commit": getCommit(), "python": sys.version.split()[0]}
+
+    if args.output:
+        with open(args.output, "w") as fout:
+            json.dump({"meta": meta, "results": results}, fout, indent=1)
+    if args.csv:
+        with open(args.csv, "w", newline="") as fout:
+            writer = csv.DictWriter(fout, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(results)
+
+    if baseline is not None:
+        sys.exit(1 if compareResults(baseline, results, args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
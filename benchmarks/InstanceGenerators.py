@@ -0,0 +1,96 @@
+"""Seeded generators of random instances, in the input formats of the labs.
+
+The same arguments always give the same instance, so the instances don't have to be stored with the results.
+
+Usage (from the repository root):
+    python -m benchmarks.InstanceGenerators blocks BLOCKS STACKS GOALS SEED
+    python -m benchmarks.InstanceGenerators puzzle WIDTH MOVES SEED
+"""
+import argparse
+import random
+
+
+def generateBlocks(numBlocks, numStacks, numGoals, seed):
+    """A blocks world instance: the start state and each scope state are random placements of the same blocks
+
+    Args:
+        numBlocks (int): At most 26, the blocks are labeled a, b, c ...
+        numStacks (int): At least 3, so that every placement can be reached from every other one
+        numGoals (int): The number of scope states
+        seed (int)
+
+    Returns:
+        str: The instance, in the format of blocks.txt
+    """
+    if not 1 <= numBlocks <= 26:
+        raise Exception("The number of blocks must be between 1 and 26")
+    if numStacks < 3:
+        raise Exception("At least 3 stacks are needed")
+
+    rng = random.Random(seed)
+    labels = [chr(ord('a') + i) for i in range(numBlocks)]
+
+    def randomStacks():
+        stacks = [[] for _ in range(numStacks)]
+        for block in rng.sample(labels, numBlocks):
+            stacks[rng.randrange(numStacks)].append(block)
+        return "\n".join(" ".join(stack) if stack else "#" for stack in stacks)
+
+    start = randomStacks()
+    scopes = [randomStacks() for _ in range(numGoals)]
+    return start + "\nstari_finale\n" + "\n---\n".join(scopes) + "\n"
+
+
+def generatePuzzle(width, moves, seed):
+    """A sliding puzzle instance, obtained from the scope state by a random walk of the empty cell.
+    Since every move can be undone, the instance is always solvable, in at most `moves` moves
+
+    Args:
+        width (int): The width of the board
+        moves (int): The length of the random walk (a move never undoes the previous one)
+        seed (int)
+
+    Returns:
+        str: The instance, in the format of 8puzzle.txt
+    """
+    rng = random.Random(seed)
+    cells = list(range(1, width * width)) + [0]
+    empty = width * width - 1
+    previous = None
+
+    for _ in range(moves):
+        line, col = divmod(empty, width)
+        neighbours = [
+            (line + dl) * width + col + dc
+            for dl, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]
+            if 0 <= line + dl < width and 0 <= col + dc < width and (line + dl) * width + col + dc != previous
+        ]
+        cell = rng.choice(neighbours)
+        cells[empty], cells[cell] = cells[cell], 0
+        previous, empty = empty, cell
+
+    return "\n".join(" ".join(str(tile) for tile in cells[i:i + width]) for i in range(0, len(cells), width)) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="domain", required=True)
+    blocksParser = subparsers.add_parser("blocks")
+    blocksParser.add_argument("blocks", type=int)
+    blocksParser.add_argument("stacks", type=int)
+    blocksParser.add_argument("goals", type=int)
+    blocksParser.add_argument("seed", type=int)
+    puzzleParser = subparsers.add_parser("puzzle")
+    puzzleParser.add_argument("width", type=int)
+    puzzleParser.add_argument("moves", type=int)
+    puzzleParser.add_argument("seed", type=int)
+    args = parser.parse_args()
+
+    if args.domain == "blocks":
+        print(generateBlocks(args.blocks, args.stacks, args.goals, args.seed), end="")
+    else:
+        print(generatePuzzle(args.width, args.moves, args.seed), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Compares the peak memory of a search that uses regular nodes with one that uses compact nodes.
+
+Each search runs in its own process, so the reported peak RSS (ru_maxrss) belongs to that search only.
+
+Usage (from the repository root):
+    python -m benchmarks.NodeMemoryBenchmark puzzle [8puzzle.txt] [--heuristic euristica_admisibila_1]
+    python -m benchmarks.NodeMemoryBenchmark blocks [blocks.txt] [--heuristic euristica_admisibila_2]
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from libs.TraversalTree import Search
+
+NODE_KINDS = ["Node", "CompactNode"]
+DEFAULT_FILES = {"puzzle": "8puzzle.txt", "blocks": "blocks.txt"}
+
+
+def getPeakRss():
+    """Returns the peak resident set size of the current process, in KB (Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def runWorker(domain, fileName, heuristicType, nodeKind):
+    if domain == "puzzle":
+        import Lab3_8puzzle as lab
+        search = Search.treeAStar
+    else:
+        import Lab2_AStar_Blocks as lab
+        search = Search.aStar
+
+    with open(fileName) as fin:
+        graph = lab.Graph(fin.read())
+    graph.nodeClass = getattr(lab, nodeKind)
+
+    generated = [0]
+    generateSuccessors = graph.generateSuccessors
+
+    def countingGenerateSuccessors(currentNode, heuristicType):
+        succ = generateSuccessors(currentNode, heuristicType)
+        generated[0] += len(succ)
+        return succ
+
+    graph.generateSuccessors = countingGenerateSuccessors
+
+    rssBefore = getPeakRss()
+    start = time.perf_counter()
+    solution = next(search(graph, heuristicType), None)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "node": nodeKind,
+        "generated": generated[0],
+        "seconds": round(elapsed, 3),
+        "rssBeforeKB": rssBefore,
+        "peakRssKB": getPeakRss(),
+        "solution": f"Cost: {solution.cost}" if solution is not None else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("domain", choices=sorted(DEFAULT_FILES))
+    parser.add_argument("file", nargs="?")
+    parser.add_argument("--heuristic", default="euristica_admisibila_1")
+    parser.add_argument("--worker", choices=NODE_KINDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    fileName = args.file or DEFAULT_FILES[args.domain]
+
+    if args.worker:
+        runWorker(args.domain, fileName, args.heuristic, args.worker)
+        return
+
+    print(f"{'node':<13}{'generated':>11}{'seconds':>10}{'baseline RSS':>15}{'peak RSS':>12}{'search RSS':>13}  solution")
+    for nodeKind in NODE_KINDS:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.NodeMemoryBenchmark", args.domain, fileName,
+             "--heuristic", args.heuristic, "--worker", nodeKind],
+            capture_output=True, text=True, check=True)
+        r = json.loads(result.stdout)
+        print(f"{r['node']:<13}{r['generated']:>11}{r['seconds']:>10}{r['rssBeforeKB']:>12} KB{r['peakRssKB']:>9} KB"
+              f"{r['peakRssKB'] - r['rssBeforeKB']:>10} KB  {r['solution']}")
+
+
+if __name__ == "__main__":
+    main()
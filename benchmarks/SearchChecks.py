@@ -0,0 +1,140 @@
+"""Checks the results of the searches against reference searches on small seeded instances.
+
+Every check runs with a time limit, so a search that doesn't terminate fails its check instead of hanging the run.
+The failures are listed and the exit status is 1 if there is at least one.
+
+Checks:
+    kbest: Search.kBestUniformCostSearch returns the same costs as the first k solutions of Search.uniformCostSearch
+    sma: Lab2_AStar_Blocks.smaStar with small memory budgets returns the optimal cost (the one of aStar) when the
+        optimal path fits in the budget, and None or a path that fits otherwise
+
+Usage (from the repository root):
+    python -m benchmarks.SearchChecks [--checks kbest sma] [--seeds 10] [--time-limit 60]
+"""
+import argparse
+import itertools
+import signal
+import sys
+
+import Lab1_Blocks
+import Lab2_AStar_Blocks
+from benchmarks.InstanceGenerators import generateBlocks
+from libs.TraversalTree import Search
+
+# the values of k of the kbest checks
+KBEST_VALUES = [1, 3, 8, 20]
+# (number of blocks, number of stacks, seed) of the instance whose optimal path (7 nodes) needs budgets of 8 or more
+SMA_INSTANCE = (4, 4, 2)
+SMA_BUDGETS = [2, 4, 6, 8, 12]
+
+
+class CheckTimeout(Exception):
+    pass
+
+
+def raiseTimeout(signum, frame):
+    raise CheckTimeout()
+
+
+def checkKBest(data, k, nodeClass):
+    """Returns the description of the failure, or None if kBestUniformCostSearch is right"""
+    graph = Lab1_Blocks.Graph(data)
+    graph.nodeClass = nodeClass
+    costs = [solution.cost for solution in itertools.islice(Search.kBestUniformCostSearch(graph, k), k)]
+    graph = Lab1_Blocks.Graph(data)
+    expected = [solution.cost for solution in itertools.islice(Search.uniformCostSearch(graph), k)]
+    if costs != expected:
+        return f"costs {costs} instead of {expected}"
+    return None
+
+
+def checkSmaStar(data, maxNodes, heuristicType="euristica_admisibila_2"):
+    """Returns the description of the failure, or None if smaStar is right"""
+    optimal = next(Search.aStar(Lab2_AStar_Blocks.Graph(data), heuristicType))
+    optimalNodes = len(optimal.path)
+    solution, _, _ = Lab2_AStar_Blocks.smaStar(Lab2_AStar_Blocks.Graph(data), heuristicType, maxNodes)
+
+    if solution is None:
+        if optimalNodes <= maxNodes:
+            return f"no solution, but the optimal path ({optimalNodes} nodes) fits"
+        return None
+    pathNodes = len(solution.getPath())
+    if pathNodes > maxNodes:
+        return f"the path has {pathNodes} nodes"
+    if solution.cost < optimal.cost or optimalNodes <= maxNodes and solution.cost != optimal.cost:
+        return f"cost {solution.cost} instead of {optimal.cost}"
+    return None
+
+
+def kBestChecks(seeds):
+    """Yields (name, function) pairs, function returning the description of the failure or None"""
+    for seed in range(seeds):
+        numBlocks, numGoals = 3 + seed % 2, 1 + seed // 2 % 2
+        data = generateBlocks(numBlocks, 3, numGoals, seed)
+        graph = Lab1_Blocks.Graph(data)
+        if graph.start in graph.scopesSet:
+            # there may be a single solution, which uniformCostSearch can't prove without exploring every path
+            continue
+        for k in KBEST_VALUES:
+            for nodeClass in [Lab1_Blocks.Node, Lab1_Blocks.CompactNode]:
+                yield f"kbest blocks({numBlocks},3,{numGoals},{seed}) k={k} {nodeClass.__name__}", \
+                    lambda data=data, k=k, nodeClass=nodeClass: checkKBest(data, k, nodeClass)
+
+
+def smaChecks(seeds):
+    """Yields (name, function) pairs, function returning the description of the failure or None"""
+    numBlocks, numStacks, seed = SMA_INSTANCE
+    for maxNodes in SMA_BUDGETS:
+        data = generateBlocks(numBlocks, numStacks, 1, seed)
+        yield f"sma blocks({numBlocks},{numStacks},{seed}) maxNodes={maxNodes}", \
+            lambda data=data, maxNodes=maxNodes: checkSmaStar(data, maxNodes)
+    for seed in range(seeds):
+        numBlocks, numStacks = 3 + seed % 2, 3 + seed // 2 % 2
+        data = generateBlocks(numBlocks, numStacks, 1, seed)
+        for maxNodes in SMA_BUDGETS:
+            yield f"sma blocks({numBlocks},{numStacks},{seed}) maxNodes={maxNodes}", \
+                lambda data=data, maxNodes=maxNodes: checkSmaStar(data, maxNodes)
+
+
+CHECKS = {
+    "kbest": kBestChecks,
+    "sma": smaChecks,
+}
+
+
+def runChecks(names, seeds, timeLimit, log=sys.stderr):
+    """Runs the checks and returns the list of (check, failure) pairs"""
+    failures = []
+    signal.signal(signal.SIGALRM, raiseTimeout)
+    for name in names:
+        for check, function in CHECKS[name](seeds):
+            signal.setitimer(signal.ITIMER_REAL, timeLimit)
+            try:
+                try:
+                    failure = function()
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            except CheckTimeout:
+                failure = f"no result after {timeLimit}s"
+            print(f"{check}: {failure or 'ok'}", file=log)
+            if failure:
+                failures.append((check, failure))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", nargs="+", choices=sorted(CHECKS), default=sorted(CHECKS))
+    parser.add_argument("--seeds", type=int, default=10, help="the number of random instances of each check")
+    parser.add_argument("--time-limit", type=float, default=60, help="seconds per check")
+    args = parser.parse_args()
+
+    failures = runChecks(args.checks, args.seeds, args.time_limit)
+    for check, failure in failures:
+        print(f"FAILED {check}: {failure}")
+    print(f"{len(failures)} failed checks")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Microbenchmark for the successor generation of the blocks world.
+
+Compares Lab1_Blocks.Graph.generateSuccessors (immutable stacks shared between parent and child)
+with the old implementation, which deep-copied the whole configuration twice per move.
+For each implementation it reports the time and the memory allocated per expansion.
+
+Usage (from the repository root):
+    python -m benchmarks.SuccessorBenchmark [blocks.txt] [--nodes 2000] [--repeat 5]
+"""
+import argparse
+import copy
+import time
+import tracemalloc
+
+from Lab1_Blocks import Graph, Node
+
+
+def deepcopyGenerateSuccessors(currentNode):
+    """The old successor generation, working on nodes whose info is a list of lists"""
+    lstSucc = []
+    currentStacks = currentNode.info
+    for i in range(len(currentStacks)):
+        if len(currentStacks[i]) == 0:
+            continue
+        tempStacks = copy.deepcopy(currentStacks)
+        blockToMove = tempStacks[i].pop()
+
+        for j in range(len(currentStacks)):
+            if i == j:
+                continue
+
+            newStacks = copy.deepcopy(tempStacks)
+            newStacks[j].append(blockToMove)
+            if not currentNode.containsInPath(newStacks):
+                newNode = Node(
+                    newStacks, currentNode, currentNode.cost + ord(blockToMove) - ord('a') + 1)
+                lstSucc.append(newNode)
+
+    return lstSucc
+
+
+def collectNodes(graph, count):
+    """Returns the first count nodes of a breadth first traversal, to be used as the expanded nodes"""
+    nodes = [Node(graph.start, None, 0)]
+    i = 0
+    while len(nodes) < count and i < len(nodes):
+        nodes.extend(graph.generateSuccessors(nodes[i]))
+        i += 1
+    return nodes[:count]
+
+
+def toListNodes(nodes):
+    """Rebuilds the given nodes (and their parents) with list of lists infos, for the old implementation"""
+    converted = {}
+
+    def convert(node):
+        if node is None:
+            return None
+        if id(node) not in converted:
+            converted[id(node)] = Node(node.info.toLists(), convert(node.parent), node.cost)
+        return converted[id(node)]
+
+    return [convert(node) for node in nodes]
+
+
+def measure(generate, nodes, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for node in nodes:
+            generate(node)
+        best = min(best, time.perf_counter() - start)
+
+    # the successors are kept alive so that we measure everything that was allocated for them
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    successors = [generate(node) for node in nodes]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    stats = after.compare_to(before, "filename")
+    allocatedBytes = sum(stat.size_diff for stat in stats)
+    allocatedBlocks = sum(stat.count_diff for stat in stats)
+    generated = sum(len(succ) for succ in successors)
+
+    return {
+        "usPerExpansion": best / len(nodes) * 1e6,
+        "bytesPerExpansion": allocatedBytes / len(nodes),
+        "blocksPerExpansion": allocatedBlocks / len(nodes),
+        "generated": generated,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file", nargs="?", default="blocks.txt")
+    parser.add_argument("--nodes", type=int, default=2000, help="number of nodes to expand")
+    parser.add_argument("--repeat", type=int, default=5, help="the best time out of this many runs is reported")
+    args = parser.parse_args()
+
+    with open(args.file) as fin:
+        graph = Graph(fin.read())
+
+    nodes = collectNodes(graph, args.nodes)
+    results = {
+        "deepcopy": measure(deepcopyGenerateSuccessors, toListNodes(nodes), args.repeat),
+        "shared stacks": measure(graph.generateSuccessors, nodes, args.repeat),
+    }
+
+    print(f"{len(nodes)} expansions on {args.file}")
+    print(f"{'implementation':<16}{'us/expansion':>14}{'bytes/expansion':>18}{'allocs/expansion':>18}{'generated':>11}")
+    for name, result in results.items():
+        print(f"{name:<16}{result['usPerExpansion']:>14.2f}{result['bytesPerExpansion']:>18.0f}"
+              f"{result['blocksPerExpansion']:>18.1f}{result['generated']:>11}")
+
+
+if __name__ == "__main__":
+    main()
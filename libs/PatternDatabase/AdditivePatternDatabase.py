@@ -0,0 +1,94 @@
+"""Builds the additive pattern databases of a sliding puzzle and saves them to a directory.
+
+Usage (from the repository root):
+    python -m libs.PatternDatabase.AdditivePatternDatabase DIRECTORY [--width 3]
+"""
+import argparse
+import os
+
+from libs.PatternDatabase.PatternDatabase import PatternDatabase
+
+
+def defaultPatterns(width):
+    """Splits the tiles of the board into disjoint patterns that are small enough to be built quickly"""
+    tiles = list(range(1, width * width))
+    patternSize = {2: 3, 3: 4, 4: 5}.get(width)
+    if patternSize is None:
+        raise Exception(f"There are no default patterns for a {width}x{width} board")
+    return [tuple(tiles[i:i + patternSize]) for i in range(0, len(tiles), patternSize)]
+
+
+class AdditivePatternDatabase:
+    """A set of pattern databases built for disjoint patterns.
+    Since each database counts only the moves of its own tiles, the sum of their values is an admissible heuristic.
+
+    Attributes:
+        databases ([PatternDatabase])
+    """
+
+    def __init__(self, databases):
+        self.databases = databases
+        patterns = [tile for database in databases for tile in database.pattern]
+        if len(patterns) != len(set(patterns)):
+            raise Exception("The patterns of an additive pattern database must be disjoint")
+
+    @classmethod
+    def build(cls, width, goal, patterns=None):
+        """
+        Args:
+            width (int): The width of the board
+            goal ([int]): The tile in each cell of the goal, line by line (0 is the empty cell)
+            patterns ([(int)]): Disjoint sets of tiles, defaultPatterns(width) if not given
+        """
+        if patterns is None:
+            patterns = defaultPatterns(width)
+        return cls([PatternDatabase.build(width, goal, pattern) for pattern in patterns])
+
+    @staticmethod
+    def getFileName(directory, database):
+        return os.path.join(directory, "pdb_" + "_".join(str(tile) for tile in database.pattern) + ".bin")
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for database in self.databases:
+            database.save(self.getFileName(directory, database))
+
+    @classmethod
+    def load(cls, directory):
+        """Memory-maps every pattern database found in the directory"""
+        fileNames = sorted(name for name in os.listdir(directory) if name.startswith("pdb_") and name.endswith(".bin"))
+        if not fileNames:
+            raise Exception(f"No pattern databases found in {directory}")
+        return cls([PatternDatabase.load(os.path.join(directory, name)) for name in fileNames])
+
+    def matches(self, width, goal):
+        """Checks if the databases were built for the given board and goal"""
+        return all(database.width == width and database.goal == list(goal) for database in self.databases)
+
+    def heuristic(self, cells):
+        """
+        Args:
+            cells ([int]): The tile in each cell of the board, line by line
+
+        Returns:
+            int: The sum of the values of all the databases
+        """
+        tilePositions = [0] * len(cells)
+        for k, tile in enumerate(cells):
+            tilePositions[tile] = k
+        return sum(database.lookup(tilePositions) for database in self.databases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--width", type=int, default=3)
+    args = parser.parse_args()
+
+    cellsCount = args.width * args.width
+    goal = list(range(1, cellsCount)) + [0]
+    AdditivePatternDatabase.build(args.width, goal).save(args.directory)
+
+
+if __name__ == "__main__":
+    main()
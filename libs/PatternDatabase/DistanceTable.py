@@ -0,0 +1,134 @@
+"""Builds the table with the exact distance of every 8-puzzle state and saves it to a file.
+
+Usage (from the repository root):
+    python -m libs.PatternDatabase.DistanceTable FILE
+"""
+import argparse
+import collections
+import mmap
+
+MAGIC = b"DST1"
+WIDTH = 3
+CELLS_COUNT = WIDTH * WIDTH
+# the number of even (or odd) permutations of the 8 tiles
+HALF_PERMUTATIONS = 20160
+UNKNOWN = 255
+
+
+class DistanceTable:
+    """The exact distance to the goal of every reachable state of the 8-puzzle.
+
+    A state is ranked by the position of the empty cell and the Lehmer code of the permutation of the 8 tiles
+    (read line by line). All the states reachable from the goal have tile permutations of the same parity, and
+    two permutations whose Lehmer codes differ only in the last digit have different parities, so the Lehmer code
+    divided by 2 is enough: the table has 9 * 8! / 2 = 181440 entries, one byte each.
+
+    Attributes:
+        goal ([int]): The tile in each cell of the goal, line by line (0 is the empty cell)
+        table (bytes-like): The distance of each rank (255 for the states that can't reach the goal)
+    """
+
+    def __init__(self, goal, table):
+        self.goal = list(goal)
+        self.table = table
+        self.goalParity = self.rankWithParity(self.goal)[1]
+
+    @staticmethod
+    def rankWithParity(cells):
+        """
+        Args:
+            cells ([int]): The tile in each cell of the board, line by line
+
+        Returns:
+            (int, int): The rank of the state and the parity of the tile permutation
+        """
+        tiles = [tile for tile in cells if tile != 0]
+        lehmer = 0
+        inversions = 0
+        for i, tile in enumerate(tiles):
+            smaller = 0
+            for other in tiles[i + 1:]:
+                if other < tile:
+                    smaller += 1
+            lehmer = lehmer * (len(tiles) - i) + smaller
+            inversions += smaller
+        return cells.index(0) * HALF_PERMUTATIONS + lehmer // 2, inversions % 2
+
+    @classmethod
+    def rank(cls, cells):
+        return cls.rankWithParity(cells)[0]
+
+    def distance(self, cells):
+        """Returns the number of moves of an optimal solution, or None if the goal can't be reached"""
+        index, parity = self.rankWithParity(cells)
+        # a state of the other parity shares its rank with a reachable state, so it has to be ruled out first
+        if parity != self.goalParity or self.table[index] == UNKNOWN:
+            return None
+        return self.table[index]
+
+    @classmethod
+    def build(cls, goal):
+        """Builds the table with a single breadth first search from the goal (the moves are reversible)"""
+        if len(goal) != CELLS_COUNT:
+            raise Exception("The distance table can only be built for the 3x3 board")
+
+        neighbours = []
+        for k in range(CELLS_COUNT):
+            line, col = divmod(k, WIDTH)
+            neighbours.append([
+                (line + dl) * WIDTH + col + dc
+                for dl, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]
+                if 0 <= line + dl < WIDTH and 0 <= col + dc < WIDTH
+            ])
+
+        table = bytearray([UNKNOWN]) * (CELLS_COUNT * HALF_PERMUTATIONS)
+        start = tuple(goal)
+        table[cls.rank(start)] = 0
+        queue = collections.deque([start])
+
+        while queue:
+            cells = queue.popleft()
+            distance = table[cls.rank(cells)]
+            empty = cells.index(0)
+            for cell in neighbours[empty]:
+                newCells = list(cells)
+                newCells[empty], newCells[cell] = newCells[cell], 0
+                index = cls.rank(newCells)
+                if table[index] == UNKNOWN:
+                    table[index] = distance + 1
+                    queue.append(tuple(newCells))
+
+        return cls(goal, table)
+
+    def save(self, path):
+        with open(path, "wb") as fout:
+            fout.write(MAGIC)
+            fout.write(bytes(self.goal))
+            fout.write(self.table)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a table saved with save. The table is memory-mapped, not read"""
+        with open(path, "rb") as fin:
+            data = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if data[:4] != MAGIC:
+            raise Exception(f"{path} is not a distance table")
+        goal = list(data[4:4 + CELLS_COUNT])
+        table = memoryview(data)[4 + CELLS_COUNT:]
+        if len(table) != CELLS_COUNT * HALF_PERMUTATIONS:
+            raise Exception(f"{path} is truncated")
+        return cls(goal, table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file")
+    args = parser.parse_args()
+
+    goal = list(range(1, CELLS_COUNT)) + [0]
+    DistanceTable.build(goal).save(args.file)
+
+
+if __name__ == "__main__":
+    main()
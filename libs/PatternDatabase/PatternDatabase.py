@@ -0,0 +1,143 @@
+import collections
+import mmap
+
+MAGIC = b"PDB1"
+
+
+class PatternDatabase:
+    """A pattern database for the NxN sliding puzzle.
+
+    For a pattern (a subset of the tiles) the database stores, for every placement of those tiles on the board,
+    the minimum number of moves of the pattern tiles needed to bring them to their positions in the goal.
+    Moves of the other tiles are free, so the databases of disjoint patterns can be added up into an
+    admissible heuristic (see AdditivePatternDatabase).
+
+    The table is a byte array indexed by the rank of the pattern tiles' positions (see rank), and it can be
+    saved to a file and loaded back with mmap, so loading is near-instant and the memory is shared by all the
+    processes that load the same file.
+
+    Attributes:
+        width (int): The width of the board
+        goal ([int]): The tile in each cell of the goal, line by line (0 is the empty cell)
+        pattern ((int)): The tiles of the pattern
+        table (bytes-like): The distance for each rank
+    """
+
+    def __init__(self, width, goal, pattern, table):
+        self.width = width
+        self.goal = list(goal)
+        self.pattern = tuple(pattern)
+        self.table = table
+        self.cellsCount = width * width
+
+    @staticmethod
+    def tableSize(cellsCount, patternSize):
+        size = 1
+        for i in range(patternSize):
+            size *= cellsCount - i
+        return size
+
+    def rank(self, positions):
+        """Ranks a placement of the pattern tiles (the position of each tile, in the order of the pattern)
+        as a number in [0, n * (n - 1) * ... * (n - k + 1)), where n is the number of cells and k the number of tiles
+        """
+        index = 0
+        used = 0
+        for i, pos in enumerate(positions):
+            # the position is counted only among the cells that are not taken by the previous tiles
+            smaller = bin(used & ((1 << pos) - 1)).count("1")
+            index = index * (self.cellsCount - i) + pos - smaller
+            used |= 1 << pos
+        return index
+
+    def lookup(self, tilePositions):
+        """Returns the distance stored for the given board
+
+        Args:
+            tilePositions ([int]): The cell of each tile, indexed by the tile
+        """
+        return self.table[self.rank([tilePositions[tile] for tile in self.pattern])]
+
+    @classmethod
+    def build(cls, width, goal, pattern):
+        """Builds the database with a backward breadth first search from the goal.
+
+        The search runs over (placement of the pattern tiles, position of the empty cell) pairs and it is a 0-1 BFS:
+        moving the empty cell over a pattern tile costs 1, moving it over any other tile costs 0.
+        """
+        cellsCount = width * width
+        database = cls(width, goal, pattern, None)
+
+        neighbours = []
+        for k in range(cellsCount):
+            line, col = divmod(k, width)
+            neighbours.append([
+                (line + dl) * width + col + dc
+                for dl, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]
+                if 0 <= line + dl < width and 0 <= col + dc < width
+            ])
+
+        size = cls.tableSize(cellsCount, len(pattern))
+        unknown = 255
+        distances = bytearray([unknown]) * (size * cellsCount)
+
+        startPositions = tuple(goal.index(tile) for tile in pattern)
+        startEmpty = goal.index(0)
+        distances[database.rank(startPositions) * cellsCount + startEmpty] = 0
+        queue = collections.deque([(startPositions, startEmpty, 0)])
+
+        while queue:
+            positions, empty, distance = queue.popleft()
+            if distances[database.rank(positions) * cellsCount + empty] < distance:
+                continue
+
+            for cell in neighbours[empty]:
+                if cell in positions:
+                    newPositions = list(positions)
+                    newPositions[positions.index(cell)] = empty
+                    newPositions = tuple(newPositions)
+                    newDistance = distance + 1
+                else:
+                    newPositions = positions
+                    newDistance = distance
+
+                index = database.rank(newPositions) * cellsCount + cell
+                if newDistance < distances[index]:
+                    distances[index] = newDistance
+                    if newDistance == distance:
+                        queue.appendleft((newPositions, cell, newDistance))
+                    else:
+                        queue.append((newPositions, cell, newDistance))
+
+        table = bytearray(size)
+        for index in range(size):
+            table[index] = min(distances[index * cellsCount:(index + 1) * cellsCount])
+        database.table = table
+        return database
+
+    def save(self, path):
+        """Saves the database as a small header followed by the table"""
+        with open(path, "wb") as fout:
+            fout.write(MAGIC)
+            fout.write(bytes([self.width, len(self.pattern)]))
+            fout.write(bytes(self.pattern))
+            fout.write(bytes(self.goal))
+            fout.write(self.table)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a database saved with save. The table is memory-mapped, not read"""
+        with open(path, "rb") as fin:
+            data = mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if data[:4] != MAGIC:
+            raise Exception(f"{path} is not a pattern database")
+        width, patternSize = data[4], data[5]
+        cellsCount = width * width
+        pattern = tuple(data[6:6 + patternSize])
+        goal = list(data[6 + patternSize:6 + patternSize + cellsCount])
+        table = memoryview(data)[6 + patternSize + cellsCount:]
+
+        if len(table) != cls.tableSize(cellsCount, patternSize):
+            raise Exception(f"{path} is truncated")
+        return cls(width, goal, pattern, table)
@@ -0,0 +1,175 @@
+"""Bidirectional search that meets in the middle (MM, Holte et al. 2016), for graphs whose moves can be undone at the same cost.
+
+A forward search goes from the start state and a backward search goes from all the scope states at once (since
+the moves are reversible, the successors of a state are also its predecessors). Each direction is an A* with the
+priority max(g + h, 2g): with it, neither search goes past the middle of the optimal path, so each one explores
+about half its depth. Every time a state is reached that the other direction knows, a path through it is found;
+the best one (of cost U) is optimal as soon as U is not larger than the lower bound of every path not found yet:
+    max(the minimum priority, the minimum g + h of each direction, the sum of the minimum g of both + the cheapest move)
+
+Without a heuristic (h = 0, for the uninformed Lab1) this is a bidirectional uniform cost search. With a heuristic,
+the backward direction needs estimates towards the start state, which the graph provides through reversedGraph().
+
+Usage:
+    solution, forwardStats, backwardStats = bidirectionalSearch(graph, "euristica_admisibila_2")
+"""
+import heapq
+import itertools
+import math
+
+from libs.TraversalTree.SearchEngine import expand
+from libs.TraversalTree.SearchStats import SearchStats
+
+
+class Frontier:
+    """The open and closed nodes of one direction of the search
+
+    Attributes:
+        openNodes (dict): The node of each state in the open queue
+        closed (dict): The node of each expanded state
+        byPriority, byCost, byG ([tuple]): Binary heaps of the open nodes by max(g + h, 2g), g + h and g,
+            the outdated entries are skipped when they reach the top
+        stats (SearchStats): The counters of this direction
+    """
+
+    def __init__(self, useHeuristic, stats):
+        self.useHeuristic = useHeuristic
+        self.stats = stats
+        self.openNodes = {}
+        self.closed = {}
+        self.byPriority = []
+        self.byCost = []
+        self.byG = []
+        self.insertionIndex = itertools.count()
+
+    def find(self, info):
+        """The best known node of the state in this direction, or None"""
+        node = self.openNodes.get(info)
+        return node if node is not None else self.closed.get(info)
+
+    def add(self, node):
+        """Adds a node to the open queue, unless its state is already known with a path that is not more expensive
+
+        Returns:
+            bool: True if the node was added
+        """
+        info = node.info
+        known = self.find(info)
+        if known is not None:
+            if known.cost <= node.cost:
+                self.stats.duplicatesPruned += 1
+                return False
+            if info in self.closed:
+                del self.closed[info]
+                self.stats.reopenedNodes += 1
+
+        self.openNodes[info] = node
+        g = node.cost
+        f = g + (node.heuristic if self.useHeuristic else 0)
+        index = next(self.insertionIndex)
+        heapq.heappush(self.byPriority, (max(f, 2 * g), index, node))
+        heapq.heappush(self.byCost, (f, index, node))
+        heapq.heappush(self.byG, (g, index, node))
+        if len(self.openNodes) > self.stats.maxFrontierSize:
+            self.stats.maxFrontierSize = len(self.openNodes)
+        return True
+
+    def minimum(self, heap):
+        """The minimum key of the open nodes in the heap, math.inf if the open queue is empty"""
+        while heap and self.openNodes.get(heap[0][2].info) is not heap[0][2]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else math.inf
+
+    def pop(self):
+        """Moves the node with the minimum priority from the open queue to the closed set"""
+        self.minimum(self.byPriority)
+        node = heapq.heappop(self.byPriority)[2]
+        info = node.info
+        del self.openNodes[info]
+        self.closed[info] = node
+        return node
+
+
+def joinPaths(graph, heuristicType, forwardNode, backwardNode):
+    """Continues the forward path with the moves of the backward path (replayed forwards, so the nodes get
+    their costs and moves from the graph)
+
+    Returns:
+        Node: The scope node at the end of the whole path
+    """
+    node = forwardNode
+    nextNode = backwardNode.parent
+    while nextNode is not None:
+        info = nextNode.info
+        node = next(s for s in graph.generateSuccessors(node, heuristicType) if s.info == info)
+        nextNode = nextNode.parent
+    return node
+
+
+def bidirectionalSearch(graph, heuristicType=None, minMoveCost=1):
+    """The cheapest path from the start state to one of the scope states, see the module documentation
+
+    Args:
+        graph (Graph): A graph whose moves can be undone at the same cost. With a heuristic, it must implement
+            reversedGraph(): the same graph, with the start state as its only scope state
+        heuristicType (String): An admissible heuristic, or None for a uniform cost search
+        minMoveCost (Int): The cost of the cheapest move (a lower bound of it), used by the stopping condition
+
+    Returns:
+        (Node, SearchStats, SearchStats): The solution node (or None if there is no solution)
+            and the counters of the forward and of the backward search
+    """
+    useHeuristic = heuristicType is not None
+    if useHeuristic:
+        reversedGraph = getattr(graph, "reversedGraph", None)
+        if reversedGraph is None:
+            raise Exception("The graph can't be searched backwards with a heuristic")
+        backwardGraph = reversedGraph()
+    else:
+        backwardGraph = graph
+
+    forward = Frontier(useHeuristic, SearchStats())
+    backward = Frontier(useHeuristic, SearchStats())
+    startNode = graph.nodeClass(graph.start, None, 0,
+                                graph.calcHeuristic(graph.start, heuristicType) if useHeuristic else 0)
+    if graph.testScope(startNode):
+        forward.stats.solutionsFound += 1
+        return startNode, forward.stats, backward.stats
+    forward.add(startNode)
+    for scope in graph.scopes:
+        backward.add(backwardGraph.nodeClass(scope, None, 0,
+                                             backwardGraph.calcHeuristic(scope, heuristicType) if useHeuristic else 0))
+
+    # the cost of the best path found so far and its nodes in the two directions
+    bestCost = math.inf
+    meeting = None
+    while True:
+        forwardPriority = forward.minimum(forward.byPriority)
+        backwardPriority = backward.minimum(backward.byPriority)
+        lowerBound = max(
+            min(forwardPriority, backwardPriority),
+            forward.minimum(forward.byCost),
+            backward.minimum(backward.byCost),
+            forward.minimum(forward.byG) + backward.minimum(backward.byG) + minMoveCost,
+        )
+        if bestCost <= lowerBound:
+            break
+
+        if forwardPriority <= backwardPriority:
+            frontier, other, searchGraph = forward, backward, graph
+        else:
+            frontier, other, searchGraph = backward, forward, backwardGraph
+        currentNode = frontier.pop()
+
+        for s in expand(searchGraph, currentNode, heuristicType, frontier.stats):
+            if not frontier.add(s):
+                continue
+            otherNode = other.find(s.info)
+            if otherNode is not None and s.cost + otherNode.cost < bestCost:
+                bestCost = s.cost + otherNode.cost
+                meeting = (s, otherNode) if frontier is forward else (otherNode, s)
+
+    if meeting is None:
+        return None, forward.stats, backward.stats
+    forward.stats.solutionsFound += 1
+    return joinPaths(graph, heuristicType, *meeting), forward.stats, backward.stats
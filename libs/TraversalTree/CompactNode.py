@@ -0,0 +1,102 @@
+import abc
+
+from libs.TraversalTree.Node import Node
+
+
+class CompactNode(Node):
+    """A memory efficient Node, to be used for long searches.
+
+    The attributes are stored in __slots__ instead of a per-instance __dict__, and by default only the root
+    stores its info: every other node stores just the move that produced it from its parent, and its info is
+    rebuilt on demand by replaying the moves from the closest ancestor that has an info.
+
+    Subclasses have to implement applyMove and undoMove, and should declare their own __slots__
+    (even an empty one) so that they don't get a __dict__ back.
+
+    Attributes:
+        storeInfo (bool): Class attribute, if True every node keeps its info (only the __slots__ are used to save memory)
+        storedInfo (object): The info kept by the current node, or None if it has to be rebuilt
+    """
+
+    __slots__ = ('parent', 'cost', 'heuristic', 'pathCost', 'move', 'storedInfo')
+
+    storeInfo = False
+
+    def __init__(self, info, parent, cost=1, heuristic=1, move=None):
+        self.parent = parent
+        self.cost = cost
+        self.heuristic = heuristic
+        self.pathCost = cost + heuristic
+        self.move = move
+        # a node without a move can't be rebuilt from its parent, so it keeps its info
+        self.storedInfo = info if self.storeInfo or parent is None or move is None else None
+
+    @staticmethod
+    @abc.abstractmethod
+    def applyMove(info, move):
+        """Applies a move to the given info
+
+        Returns:
+            object: The info obtained after the move
+        """
+        pass
+
+    @staticmethod
+    @abc.abstractmethod
+    def undoMove(info, move):
+        """Reverts a move, i.e. applyMove(info, move) followed by undoMove returns the same info
+
+        Returns:
+            object: The info from before the move
+        """
+        pass
+
+    @property
+    def info(self):
+        if self.storedInfo is not None:
+            return self.storedInfo
+
+        moves = []
+        node = self
+        while node.storedInfo is None:
+            moves.append(node.move)
+            node = node.parent
+
+        info = node.storedInfo
+        for move in reversed(moves):
+            info = self.applyMove(info, move)
+        return info
+
+    def getPath(self):
+        """Method that retrieves the path from the root to the current node.
+        The infos of the nodes on the path are rebuilt once, in a single pass, and kept by those nodes
+
+        Returns:
+            [Node]: The path as a list of Node objects
+        """
+        path = super().getPath()
+        for parent, node in zip(path, path[1:]):
+            if node.storedInfo is None:
+                node.storedInfo = self.applyMove(parent.storedInfo, node.move)
+        return path
+
+    def containsInPath(self, nodeInfo):
+        """Method that checks if the given node is already part of the current path.
+        The infos of the ancestors are obtained by undoing the moves one by one, so the check takes linear time
+
+        Args:
+            nodeInfo (Node.info): The information of the node which we want to check against the path's nodes
+
+        Returns:
+            bool: True if a Node with the same info already exists in the path, False otherwise
+        """
+        pathNode = self
+        info = self.info
+        while True:
+            if info == nodeInfo:
+                return True
+            parent = pathNode.parent
+            if parent is None:
+                return False
+            info = parent.storedInfo if parent.storedInfo is not None else self.undoMove(info, pathNode.move)
+            pathNode = parent
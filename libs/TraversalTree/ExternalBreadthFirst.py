@@ -0,0 +1,197 @@
+"""Breadth first search with the visited states kept on disk, for state spaces that don't fit in memory.
+
+The search goes layer by layer (all the states at depth d, then all the states at depth d + 1) and the states
+of each layer are stored in a file, as fixed size records encoded by graph.encodeState, sorted and without
+duplicates. Duplicates are not detected when a state is generated (that would need the visited set in
+memory) but when the next layer is written (delayed duplicate detection):
+
+    - the successors of the current layer are read sequentially and collected in a buffer of runSize records,
+      which is sorted and written to a run file every time it is full
+    - the sorted runs are merged into a single sorted stream, without duplicates
+    - since every move can be undone, the successors of layer d can only be in the layers d - 1, d and d + 1,
+      so the stream is merged against the files of the previous two layers and the states found there are dropped
+
+Every file is read and written sequentially through large buffers and only runSize records (plus a record of
+each run during the merge) are in memory at a time. The layers are kept until the search ends, so that the
+path of a solution can be rebuilt backwards: the predecessor of a state of layer d is one of its neighbours that
+is in layer d - 1.
+
+The graph must implement encodeState(info) -> bytes (all the records of a graph having the same length),
+decodeState(bytes) -> info and recordSize, and each of its moves must be reversible. The solutions are found
+in the order of their length (like Search.breadthFirstHashed, each scope state is reached at most once).
+
+Usage:
+    for solution in externalBreadthFirst(graph, directory="/mnt/scratch", runSize=10 ** 7):
+        ...
+"""
+import heapq
+import os
+import tempfile
+
+from libs.TraversalTree.SearchStats import SearchStats
+from libs.TraversalTree.Solution import Solution
+
+# the size of the buffer of every file that is read or written
+BUFFER_SIZE = 1 << 20
+
+
+def readRecords(path, recordSize):
+    """Yields the records of a file, reading it sequentially in chunks of about BUFFER_SIZE bytes"""
+    chunkSize = max(BUFFER_SIZE // recordSize, 1) * recordSize
+    with open(path, "rb", buffering=0) as fin:
+        while True:
+            chunk = fin.read(chunkSize)
+            if not chunk:
+                return
+            for i in range(0, len(chunk), recordSize):
+                yield chunk[i:i + recordSize]
+
+
+def writeRecords(path, records):
+    """Writes the records to a file and returns their number"""
+    count = 0
+    with open(path, "wb", buffering=BUFFER_SIZE) as fout:
+        for record in records:
+            fout.write(record)
+            count += 1
+    return count
+
+
+def unique(sortedRecords):
+    """Drops the repeated records of a sorted stream"""
+    previous = None
+    for record in sortedRecords:
+        if record != previous:
+            yield record
+            previous = record
+
+
+def subtract(sortedRecords, sortedExcluded, stats):
+    """Drops the records that are also in the sorted stream sortedExcluded, in a single pass over both"""
+    excluded = next(sortedExcluded, None)
+    for record in sortedRecords:
+        while excluded is not None and excluded < record:
+            excluded = next(sortedExcluded, None)
+        if record == excluded:
+            stats.duplicatesPruned += 1
+            continue
+        yield record
+
+
+class LayerWriter:
+    """Collects the successors of a layer and writes them to sorted run files of at most runSize records"""
+
+    def __init__(self, directory, depth, runSize):
+        self.directory = directory
+        self.depth = depth
+        self.runSize = runSize
+        self.buffer = []
+        self.runs = []
+
+    def add(self, record):
+        self.buffer.append(record)
+        if len(self.buffer) >= self.runSize:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        self.buffer.sort()
+        path = os.path.join(self.directory, f"run{self.depth}_{len(self.runs)}.bin")
+        writeRecords(path, unique(self.buffer))
+        self.runs.append(path)
+        self.buffer = []
+
+    def merge(self, recordSize):
+        """Yields the records of all the runs, sorted and without duplicates"""
+        self.flush()
+        return unique(heapq.merge(*(readRecords(path, recordSize) for path in self.runs)))
+
+    def removeRuns(self):
+        for path in self.runs:
+            os.remove(path)
+        self.runs = []
+
+
+def rebuildPath(graph, layers, depth, record, heuristicType=None):
+    """Rebuilds the path of a state found in the given layer, going backwards through the layer files
+
+    Returns:
+        Node: The node of the state, its ancestors being the nodes of the path from the start node
+    """
+    states = [graph.decodeState(record)]
+    for d in range(depth - 1, -1, -1):
+        # the moves are reversible, so the predecessors of a state are among its successors
+        neighbours = {graph.encodeState(s.info)
+                      for s in graph.generateSuccessors(graph.nodeClass(states[-1], None), heuristicType)}
+        predecessor = next(r for r in readRecords(layers[d], graph.recordSize) if r in neighbours)
+        states.append(graph.decodeState(predecessor))
+
+    # the path is replayed forwards, so the nodes get their costs and moves from the graph
+    node = graph.nodeClass(graph.start, None, 0)
+    for state in reversed(states[:-1]):
+        node = next(s for s in graph.generateSuccessors(node, heuristicType) if s.info == state)
+    return node
+
+
+def externalBreadthFirst(graph, directory=None, runSize=1000000, maxDepth=None, heuristicType=None, stats=None):
+    """Breadth first search with delayed duplicate detection on disk, see the module documentation
+
+    Args:
+        graph (Graph): A graph with reversible moves that implements encodeState, decodeState and recordSize
+        directory (str): Where the layer files are written, a new temporary directory if not given
+        runSize (int): The number of records sorted in memory at a time
+        maxDepth (int): The depth at which the search stops, no limit if not given
+        heuristicType (String): Passed to generateSuccessors
+        stats (SearchStats)
+
+    Yields:
+        Solution: A solution for each scope state, in the order of their length
+    """
+    stats = stats if stats is not None else SearchStats()
+    recordSize = graph.recordSize
+    scopeRecords = {graph.encodeState(scope) for scope in graph.scopes}
+
+    with tempfile.TemporaryDirectory(dir=directory, prefix="bfs-") as workDirectory:
+        layers = [os.path.join(workDirectory, "layer0.bin")]
+        startRecord = graph.encodeState(graph.start)
+        writeRecords(layers[0], [startRecord])
+        if startRecord in scopeRecords:
+            stats.solutionsFound += 1
+            yield Solution(graph.nodeClass(graph.start, None, 0), stats.copy())
+
+        depth = 0
+        layerSize = 1
+        while layerSize > 0 and (maxDepth is None or depth < maxDepth):
+            writer = LayerWriter(workDirectory, depth + 1, runSize)
+            for record in readRecords(layers[depth], recordSize):
+                node = graph.nodeClass(graph.decodeState(record), None)
+                succ = graph.generateSuccessors(node, heuristicType)
+                stats.expandedNodes += 1
+                stats.generatedNodes += len(succ)
+                for s in succ:
+                    writer.add(graph.encodeState(s.info))
+
+            records = writer.merge(recordSize)
+            records = subtract(records, readRecords(layers[depth], recordSize), stats)
+            if depth > 0:
+                records = subtract(records, readRecords(layers[depth - 1], recordSize), stats)
+
+            found = []
+
+            def checkScopes(records):
+                for record in records:
+                    if record in scopeRecords:
+                        found.append(record)
+                    yield record
+
+            depth += 1
+            layers.append(os.path.join(workDirectory, f"layer{depth}.bin"))
+            layerSize = writeRecords(layers[depth], checkScopes(records))
+            writer.removeRuns()
+            if layerSize > stats.maxFrontierSize:
+                stats.maxFrontierSize = layerSize
+
+            for record in found:
+                stats.solutionsFound += 1
+                yield Solution(rebuildPath(graph, layers, depth, record, heuristicType), stats.copy())
@@ -1,4 +1,5 @@
 import abc
+import functools
 
 
 class Graph(metaclass=abc.ABCMeta):
@@ -7,8 +8,22 @@ class Graph(metaclass=abc.ABCMeta):
     Attributes:
         start (Node): The initial state
         scopes ([Node]): The scope states
+        nodeClass (type): The Node class used to build the traversal tree over this graph
+        heuristics (dict): Maps each heuristic type to the name of the method that calculates it
+            or to a function(graph, nodeInfo) (see getHeuristic and registerHeuristic)
+        memoizedHeuristics (frozenset): The heuristic types whose values are memoized (see getHeuristic)
+        heuristicCacheSize (int): The maximum number of states whose heuristic is memoized, for each heuristic type
+            (0 disables the memoization, None makes it unbounded)
     """
 
+    heuristics = {}
+    # only the heuristics that are expensive to calculate are worth memoizing: for a cheap one,
+    # the hashing of the state and the bookkeeping of the cache cost more than the calculation itself
+    memoizedHeuristics = frozenset()
+    heuristicCacheSize = 65536
+    # the functions returned by getHeuristic, built on first use
+    resolvedHeuristics = None
+
     @abc.abstractmethod
     def __init__(self, data):
         """
@@ -30,13 +45,79 @@ class Graph(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def generateSuccessors(self, currentNode):
+    def generateSuccessors(self, currentNode, heuristicType=None):
         """A method that generates all possible next states based on the current one
 
         Args:
             currentNode (Node)
+            heuristicType (String): The heuristic of the successors (see calcHeuristic), None for the uninformed searches
 
         Returns:
             [Node]: A list containing all possible next states
         """
         pass
+
+    def registerHeuristic(self, heuristicType, function, memoize=False):
+        """Adds a heuristic to the current graph (the other graphs of the same class are not affected)
+
+        Args:
+            heuristicType (String): The name of the heuristic, to be passed to the searches
+            function (String or function): The name of a method of the graph, or a function(graph, nodeInfo)
+            memoize (bool): Whether the values of the heuristic are memoized
+        """
+        self.heuristics = {**self.heuristics, heuristicType: function}
+        if memoize:
+            self.memoizedHeuristics = self.memoizedHeuristics | {heuristicType}
+        else:
+            self.memoizedHeuristics = self.memoizedHeuristics - {heuristicType}
+        if self.resolvedHeuristics is not None:
+            self.resolvedHeuristics.pop(heuristicType, None)
+
+    def getHeuristic(self, heuristicType):
+        """Resolves a heuristic type to a function(nodeInfo) only once, instead of comparing names on every node.
+        The values of the memoizedHeuristics are kept in an LRU cache of heuristicCacheSize states (the infos must be
+        hashable), so the states that are reached again through other paths don't have their heuristic recalculated.
+
+        Args:
+            heuristicType (String)
+
+        Returns:
+            function: The heuristic, as a function of the node's info
+        """
+        if self.resolvedHeuristics is None:
+            self.resolvedHeuristics = {}
+        heuristic = self.resolvedHeuristics.get(heuristicType)
+        if heuristic is not None:
+            return heuristic
+
+        function = self.heuristics.get(heuristicType)
+        if function is None:
+            raise Exception("Unknown heuristic type")
+        if isinstance(function, str):
+            heuristic = getattr(self, function)
+        else:
+            heuristic = functools.partial(function, self)
+        if heuristicType in self.memoizedHeuristics and self.heuristicCacheSize != 0:
+            heuristic = functools.lru_cache(maxsize=self.heuristicCacheSize)(heuristic)
+
+        self.resolvedHeuristics[heuristicType] = heuristic
+        return heuristic
+
+    def calcHeuristic(self, nodeInfo, heuristicType):
+        """Given a node's info and an heuristic type we calculate the heuristic for the current node
+
+        Args:
+            nodeInfo (Node.info)
+            heuristicType (String): The heuristic to be used for calculations
+
+        Returns:
+            Int: The heuristic value for the current node
+        """
+        return self.getHeuristic(heuristicType)(nodeInfo)
+
+    def heuristicCacheInfo(self):
+        """Returns the statistics of the memoized heuristics (hits, misses, maxsize, currsize) for each heuristic type"""
+        if self.resolvedHeuristics is None:
+            return {}
+        return {heuristicType: heuristic.cache_info()
+                for heuristicType, heuristic in self.resolvedHeuristics.items() if hasattr(heuristic, "cache_info")}
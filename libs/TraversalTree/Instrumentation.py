@@ -0,0 +1,227 @@
+"""Measures where the time of a search goes.
+
+Nothing is measured unless it is asked for: the searches only update the plain counters of a SearchStats
+object, and the timers are installed on a graph for the duration of a `with Instrumentation(graph)` block, as
+instance attributes that wrap generateSuccessors and the heuristic methods. Outside the block the graph
+is left untouched, so a search that is not instrumented runs at full speed.
+
+    instrumentation = Instrumentation(graph, progressCallback=printProgress, progressInterval=1)
+    with instrumentation:
+        solution = next(Search.aStar(graph, "euristica_admisibila_2", instrumentation.stats), None)
+    print(instrumentation.report())
+
+The lab scripts accept --stats (the report above, with progress lines every second) and --profile (the
+whole search under cProfile), see instrumentRun. The waits for a key press between the solutions (waitForKey) are
+not measured.
+"""
+import contextlib
+import cProfile
+import pstats
+import sys
+import time
+
+from libs.TraversalTree.SearchStats import SearchStats
+
+# the methods of the labs' graphs that compute heuristics (only the ones that exist on a graph are timed)
+HEURISTIC_METHODS = ("calcHeuristic", "updateHeuristic", "calcHeuristicParts")
+
+# the functions that stop the timers of the instrumentRun blocks being run, as context managers (see waitForKey)
+runPauses = []
+
+
+class Instrumentation:
+    """Timers and counters for the searches run on a graph inside a with block
+
+    Attributes:
+        stats (SearchStats): The counters to be passed to the searches of libs.TraversalTree.Search
+        expandCalls (int): The number of calls of generateSuccessors (counted even for searches without a SearchStats)
+        successorsCount (int): The number of nodes returned by generateSuccessors
+        heuristicCalls (int): The number of calls of the heuristic methods (nested calls are counted once)
+        generateSeconds (float): The time spent in generateSuccessors, including the heuristics it calculates
+        heuristicSeconds (float): The time spent in the heuristic methods
+        totalSeconds (float): The time spent inside the with block
+        progressCallback (function): Called with the instrumentation about every progressInterval seconds
+    """
+
+    def __init__(self, graph, progressCallback=None, progressInterval=1.0):
+        self.graph = graph
+        self.stats = SearchStats()
+        self.progressCallback = progressCallback
+        self.progressInterval = progressInterval
+
+        self.expandCalls = 0
+        self.successorsCount = 0
+        self.heuristicCalls = 0
+        self.generateSeconds = 0.0
+        self.heuristicSeconds = 0.0
+        self.totalSeconds = 0.0
+        self.startTime = None
+        self.lastProgress = None
+        self.heuristicDepth = 0
+        self.installed = []
+
+    def timeGenerate(self, generateSuccessors):
+        def timedGenerateSuccessors(*args, **kwargs):
+            start = time.perf_counter()
+            succ = generateSuccessors(*args, **kwargs)
+            end = time.perf_counter()
+            self.generateSeconds += end - start
+            self.expandCalls += 1
+            self.successorsCount += len(succ)
+            if self.progressCallback is not None and end - self.lastProgress >= self.progressInterval:
+                self.lastProgress = end
+                self.progressCallback(self)
+            return succ
+
+        return timedGenerateSuccessors
+
+    def timeHeuristic(self, heuristicMethod):
+        def timedHeuristic(*args, **kwargs):
+            # the heuristic methods call each other, only the outermost call is timed
+            if self.heuristicDepth > 0:
+                return heuristicMethod(*args, **kwargs)
+            self.heuristicDepth += 1
+            start = time.perf_counter()
+            try:
+                return heuristicMethod(*args, **kwargs)
+            finally:
+                self.heuristicSeconds += time.perf_counter() - start
+                self.heuristicCalls += 1
+                self.heuristicDepth -= 1
+
+        return timedHeuristic
+
+    def __enter__(self):
+        self.installed = ["generateSuccessors"]
+        self.graph.generateSuccessors = self.timeGenerate(self.graph.generateSuccessors)
+        for name in HEURISTIC_METHODS:
+            if hasattr(self.graph, name):
+                setattr(self.graph, name, self.timeHeuristic(getattr(self.graph, name)))
+                self.installed.append(name)
+        self.startTime = self.lastProgress = time.perf_counter()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.totalSeconds += time.perf_counter() - self.startTime
+        # the instance attributes are removed, so the methods of the class are used again
+        for name in self.installed:
+            delattr(self.graph, name)
+        self.installed = []
+        return False
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Nothing is measured inside the with block (e.g. while waiting for the user)"""
+        self.totalSeconds += time.perf_counter() - self.startTime
+        try:
+            yield
+        finally:
+            self.startTime = self.lastProgress = time.perf_counter()
+
+    def elapsed(self):
+        if self.installed:
+            return self.totalSeconds + time.perf_counter() - self.startTime
+        return self.totalSeconds
+
+    def progress(self):
+        """A one line summary of the search so far"""
+        elapsed = self.elapsed()
+        speed = self.expandCalls / elapsed if elapsed > 0 else 0
+        return (f"[{elapsed:8.1f}s] expanded {self.expandCalls}, generated {self.successorsCount}, "
+                f"frontier {self.stats.maxFrontierSize} (max), {speed:.0f} nodes/s")
+
+    def report(self):
+        """The counters and the split of the time, as text"""
+        total = self.elapsed()
+        # the heuristics of the successors are calculated inside generateSuccessors (all but the one of the start node)
+        successorsSeconds = max(self.generateSeconds - self.heuristicSeconds, 0)
+        otherSeconds = max(total - self.generateSeconds, 0)
+
+        def share(seconds):
+            return f"{seconds:10.3f}s {100 * seconds / total if total > 0 else 0:5.1f}%"
+
+        lines = [
+            f"expanded nodes:       {self.expandCalls}",
+            f"generated nodes:      {self.successorsCount}",
+            f"duplicates pruned:    {self.stats.duplicatesPruned}",
+            f"reopened nodes:       {self.stats.reopenedNodes}",
+            f"max frontier size:    {self.stats.maxFrontierSize}",
+            f"heuristic calls:      {self.heuristicCalls}",
+            f"total time:           {total:10.3f}s",
+            f"  successors:         {share(successorsSeconds)}",
+            f"  heuristics:         {share(self.heuristicSeconds)}",
+            f"  queue / bookkeeping:{share(otherSeconds)}",
+        ]
+        return "\n".join(lines)
+
+
+def printProgress(instrumentation):
+    print(instrumentation.progress(), file=sys.stderr)
+
+
+def profileCall(function, *args, sortBy="cumulative", limit=25, output=sys.stderr, **kwargs):
+    """Calls the function under cProfile and prints the most expensive functions
+
+    Returns:
+        object: The result of the function
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function, *args, **kwargs)
+    finally:
+        pstats.Stats(profiler, stream=output).sort_stats(sortBy).print_stats(limit)
+
+
+@contextlib.contextmanager
+def instrumentRun(graph, stats=False, profile=False, output=sys.stderr):
+    """Instruments the searches run inside the with block, as asked by the --stats / --profile options of the labs.
+    It yields the SearchStats to pass to the searches, or None if stats is False (then nothing is measured).
+    The time of the block includes the printing of the solutions, but not the waiting for a key press (waitForKey)
+
+    Args:
+        graph (Graph)
+        stats (bool): Whether to time the graph methods, print a progress line every second and a report at the end
+        profile (bool): Whether to run the block under cProfile and print the most expensive functions at the end
+    """
+    profiler = cProfile.Profile() if profile else None
+    instrumentation = Instrumentation(graph, printProgress) if stats else None
+
+    @contextlib.contextmanager
+    def paused():
+        if profiler is not None:
+            profiler.disable()
+        try:
+            if instrumentation is not None:
+                with instrumentation.paused():
+                    yield
+            else:
+                yield
+        finally:
+            if profiler is not None:
+                profiler.enable()
+
+    with contextlib.ExitStack() as stack:
+        if instrumentation is not None:
+            stack.enter_context(instrumentation)
+        if profiler is not None:
+            profiler.enable()
+        runPauses.append(paused)
+        try:
+            yield instrumentation.stats if instrumentation is not None else None
+        finally:
+            runPauses.remove(paused)
+            if profiler is not None:
+                profiler.disable()
+
+    if instrumentation is not None:
+        print(instrumentation.report(), file=output)
+    if profiler is not None:
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(25)
+
+
+def waitForKey():
+    """Waits for the user to press Enter, with the timers of the instrumentRun blocks stopped"""
+    with contextlib.ExitStack() as stack:
+        for paused in runPauses:
+            stack.enter_context(paused())
+        input()
@@ -10,20 +10,27 @@ class Node(metaclass=abc.ABCMeta):
         cost (Int): The cost of the path from the start node to the current node
         heuristic (Int): The approximate cost from the current node to a scope state
         pathCost (Int): The approximate cost of the path from the start node to a scope state going through the current known path
+        move (object): The move that produced the current node from its parent (or None if it is not known)
     """
 
-    def __init__(self, info, parent, cost=1, heuristic=1):
+    # the attributes are stored in the __dict__ of the subclasses, but the base class doesn't force one on them,
+    # so that compact subclasses (see CompactNode) can use __slots__ instead
+    __slots__ = ()
+
+    def __init__(self, info, parent, cost=1, heuristic=1, move=None):
         """
         Args:
             info (object): The information to be stored in the new node
             parent (Node): Node to be assigned as the parent of the new node
             cost (int): The cost associated with the path to the current node in the traversal tree
+            move (object): The move that produced the new node from its parent
         """
         self.info = info
         self.parent = parent
         self.cost = cost
         self.heuristic = heuristic
         self.pathCost = self.cost + self.heuristic
+        self.move = move
 
     def getPath(self):
         """Method that retrieves the path from the root to the current node
@@ -34,9 +41,10 @@ class Node(metaclass=abc.ABCMeta):
         path = [self]
         node = self
         while node.parent is not None:
-            path.insert(0, node.parent)
+            path.append(node.parent)
             node = node.parent
 
+        path.reverse()
         return path
 
     def printPath(self, printLength=False, printCost=False):
@@ -0,0 +1,270 @@
+"""Hash distributed A* (HDA*): an A* search split among several worker processes.
+
+Every state is owned by a single worker, chosen by its hash. Each worker keeps the open queue and the
+closed set of its own states: it expands them in the order of their approximate cost and sends every
+successor to the worker that owns it, through that worker's multiprocessing queue. The successors are
+sent in batches, so the cost of a queue operation is shared by many nodes.
+
+Since the workers expand their nodes independently, the first solution found is not necessarily optimal.
+The cost of the best solution found so far (the incumbent) is shared by all the workers and every node whose
+approximate cost is not smaller than it is pruned. The search ends when no worker has anything left to expand
+and no batch is in transit, so with an admissible heuristic the incumbent is then optimal.
+
+Termination is detected by the main process: each worker counts the nodes it has sent and received and
+raises its idle flag when it has nothing to do, and the counters and flags are updated and read under the
+same lock. When all the workers are idle and every node sent was also received, no new work can appear.
+
+The workers are started with fork: they inherit the graph, and the hashes of the strings in the states
+(which are randomized per interpreter) are the same in all of them.
+
+Usage:
+    solution, expandedNodes = parallelAStar(graph, "euristica_admisibila_2", workers=4)
+"""
+import heapq
+import itertools
+import math
+import multiprocessing
+import os
+import queue
+import time
+
+# the number of successors sent to a worker in one message
+BATCH_SIZE = 64
+# the number of nodes a worker expands before it sends its pending batches and reads its queue
+EXPANSIONS_PER_ROUND = 32
+# how often the main process checks for termination, in seconds
+POLL_INTERVAL = 0.005
+
+
+class Worker:
+    """The part of the search that runs in one worker process
+
+    Attributes:
+        index (int): The index of the worker
+        inboxes ([multiprocessing.Queue]): The queue of every worker
+        best (dict): For each known state of the worker, (cost, heuristic, parent state) of its best known path
+        open ([tuple]): Binary heap of (pathCost, -cost, -insertionIndex, state) entries, the outdated ones are skipped
+        outgoing ([list]): The successors waiting to be sent to each worker
+    """
+
+    def __init__(self, index, graph, heuristicType, shared):
+        self.index = index
+        self.graph = graph
+        self.heuristicType = heuristicType
+        self.inboxes = shared["inboxes"]
+        self.results = shared["results"]
+        self.incumbent = shared["incumbent"]
+        self.lock = shared["lock"]
+        self.idle = shared["idle"]
+        self.sent = shared["sent"]
+        self.received = shared["received"]
+        self.workersCount = len(self.inboxes)
+
+        self.best = {}
+        self.open = []
+        self.insertionIndex = itertools.count()
+        self.outgoing = [[] for _ in range(self.workersCount)]
+        self.expandedNodes = 0
+        self.goal = None
+        self.goalCost = math.inf
+
+    def addNodes(self, nodes):
+        """Adds (state, cost, heuristic, parent state) entries to the open queue, unless the state is already known with a better cost"""
+        for state, cost, heuristic, parentState in nodes:
+            known = self.best.get(state)
+            if known is not None and known[0] <= cost:
+                continue
+            self.best[state] = (cost, heuristic, parentState)
+            heapq.heappush(self.open, (cost + heuristic, -cost, -next(self.insertionIndex), state))
+
+    def send(self, state, cost, heuristic, parentState):
+        owner = hash(state) % self.workersCount
+        if owner == self.index:
+            self.addNodes([(state, cost, heuristic, parentState)])
+            return
+        batch = self.outgoing[owner]
+        batch.append((state, cost, heuristic, parentState))
+        if len(batch) >= BATCH_SIZE:
+            self.flush(owner)
+
+    def flush(self, owner):
+        batch = self.outgoing[owner]
+        if not batch:
+            return
+        # the nodes are counted as sent before they are put in the queue, so they can't be received before being counted
+        with self.lock:
+            self.sent[self.index] += len(batch)
+        self.inboxes[owner].put(("nodes", batch))
+        self.outgoing[owner] = []
+
+    def flushAll(self):
+        for owner in range(self.workersCount):
+            self.flush(owner)
+
+    def handleMessage(self, message):
+        """Returns False if the worker has to stop searching"""
+        kind = message[0]
+        if kind == "nodes":
+            # the worker is marked as busy in the same step in which the nodes are counted as received,
+            # so the main process can't see them neither in transit nor being processed
+            with self.lock:
+                self.idle[self.index] = 0
+                self.received[self.index] += len(message[1])
+            self.addNodes(message[1])
+            return True
+        return False
+
+    def expandNext(self):
+        """Expands the best node of the open queue, if it can still lead to a better solution than the incumbent
+
+        Returns:
+            bool: False if there is no such node
+        """
+        while self.open:
+            pathCost, negCost, _, state = self.open[0]
+            if pathCost >= self.incumbent.value:
+                return False
+            heapq.heappop(self.open)
+            cost, heuristic, parentState = self.best[state]
+            # the entry is outdated if a better path to the state was found after it was added
+            if cost != -negCost:
+                continue
+
+            node = self.graph.nodeClass(state, None, cost, heuristic)
+            if self.graph.testScope(node):
+                with self.incumbent.get_lock():
+                    if cost < self.incumbent.value:
+                        self.incumbent.value = cost
+                        self.goal = state
+                        self.goalCost = cost
+                continue
+
+            self.expandedNodes += 1
+            for s in self.graph.generateSuccessors(node, self.heuristicType):
+                self.send(s.info, s.cost, s.heuristic, state)
+            return True
+        return False
+
+    def run(self):
+        if self.index == hash(self.graph.start) % self.workersCount:
+            start = self.graph.start
+            self.addNodes([(start, 0, self.graph.calcHeuristic(start, self.heuristicType), None)])
+
+        searching = True
+        while searching:
+            # we read all the nodes that arrived, without waiting
+            while searching:
+                try:
+                    searching = self.handleMessage(self.inboxes[self.index].get_nowait())
+                except queue.Empty:
+                    break
+            if not searching:
+                break
+
+            expanded = 0
+            while expanded < EXPANSIONS_PER_ROUND and self.expandNext():
+                expanded += 1
+            self.flushAll()
+
+            if expanded == 0:
+                with self.lock:
+                    self.idle[self.index] = 1
+                searching = self.handleMessage(self.inboxes[self.index].get())
+
+        self.results.put(("done", self.goal, self.goalCost, self.expandedNodes))
+        # after the search, the main process asks for the parents of the states on the solution path
+        while True:
+            message = self.inboxes[self.index].get()
+            if message[0] != "parent":
+                break
+            self.results.put(("parent", message[1], self.best[message[1]]))
+
+
+def runWorker(index, graph, heuristicType, shared):
+    Worker(index, graph, heuristicType, shared).run()
+
+
+def rebuildPath(graph, shared, goal):
+    """Rebuilds the solution path by asking the owner of each state for its parent, from the goal back to the start
+
+    Returns:
+        Node: The solution node, its ancestors being the nodes of the path
+    """
+    workers = len(shared["inboxes"])
+    states = []
+    state = goal
+    while state is not None:
+        shared["inboxes"][hash(state) % workers].put(("parent", state))
+        _, _, (cost, heuristic, parentState) = shared["results"].get()
+        states.append((state, cost, heuristic))
+        state = parentState
+
+    node = None
+    for state, cost, heuristic in reversed(states):
+        node = graph.nodeClass(state, node, cost, heuristic)
+    return node
+
+
+def parallelAStar(graph, heuristicType, workers=None):
+    """A* distributed among several processes, see the module documentation. Only on systems that support fork
+
+    Args:
+        graph (Graph)
+        heuristicType (String): An admissible heuristic
+        workers (int): The number of worker processes, the number of cores if not given
+
+    Returns:
+        (Node, int): The solution node (or None if there is no solution) and the number of expanded nodes
+    """
+    existsSolution = getattr(graph, "existsSolution", None)
+    if existsSolution is not None and not existsSolution(graph.start):
+        return None, 0
+
+    workers = workers or os.cpu_count()
+    context = multiprocessing.get_context("fork")
+    lock = context.Lock()
+    shared = {
+        "inboxes": [context.Queue() for _ in range(workers)],
+        "results": context.Queue(),
+        "incumbent": context.Value("d", math.inf),
+        "lock": lock,
+        "idle": context.Array("b", workers, lock=False),
+        "sent": context.Array("q", workers, lock=False),
+        "received": context.Array("q", workers, lock=False),
+    }
+    processes = [context.Process(target=runWorker, args=(i, graph, heuristicType, shared), daemon=True)
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            with lock:
+                finished = all(shared["idle"]) and sum(shared["sent"]) == sum(shared["received"])
+            if finished:
+                break
+            if not all(process.is_alive() for process in processes):
+                raise Exception("A worker of the parallel search has failed")
+
+        for inbox in shared["inboxes"]:
+            inbox.put(("stop",))
+        goal = None
+        goalCost = math.inf
+        expandedNodes = 0
+        for _ in range(workers):
+            _, workerGoal, workerGoalCost, workerExpandedNodes = shared["results"].get()
+            expandedNodes += workerExpandedNodes
+            if workerGoalCost < goalCost:
+                goal, goalCost = workerGoal, workerGoalCost
+        solution = None if goal is None else rebuildPath(graph, shared, goal)
+    finally:
+        for inbox in shared["inboxes"]:
+            inbox.put(("exit",))
+        for process in processes:
+            process.join(1)
+            # after a failure the workers may still be searching
+            if process.is_alive():
+                process.terminate()
+
+    return solution, expandedNodes
@@ -0,0 +1,184 @@
+"""The searches of the labs as generators that yield a Solution for every scope node they reach.
+
+The search is suspended between two solutions, so asking for the next one continues it instead of starting
+over, and the caller decides how many solutions it needs:
+
+    for solution in uniformCostSearch(graph):
+        ...
+    solution = next(aStar(graph, "euristica_admisibila_2"), None)
+
+The graphs must implement generateSuccessors(currentNode, heuristicType) (the heuristic type is None for the
+uninformed searches). Each search takes an optional SearchStats object, which is updated while the search runs
+(e.g. to read the counters after the search ended without a solution); every Solution holds its own snapshot.
+
+Every search here is a configuration of the loop of libs.TraversalTree.SearchEngine (a frontier, a duplicate
+policy and a few switches); a new variant can be built the same way, by calling SearchEngine.search directly.
+"""
+import heapq
+import itertools
+import math
+
+from libs.TraversalTree.Instrumentation import waitForKey
+from libs.TraversalTree.SearchEngine import (ClosedSet, FifoFrontier, HeapFrontier, LifoFrontier, SpurSearch,
+                                             VisitLimit, expand, makeSolution, search)
+from libs.TraversalTree.SearchStats import SearchStats
+
+
+def breadthFirst(graph, heuristicType=None, stats=None):
+    """Breadth first search over the traversal tree (a state is added again for every path that reaches it)"""
+    return search(graph, FifoFrontier(), heuristicType=heuristicType, stats=stats,
+                  startNode=graph.nodeClass(graph.start, None))
+
+
+def breadthFirstHashed(graph, maxVisits=1, heuristicType=None, stats=None):
+    """Breadth first search with global duplicate detection: a state is added to the queue at most maxVisits times,
+    so at most maxVisits solutions can end in the same scope state. The scope test is done when a node is generated
+    """
+    return search(graph, FifoFrontier(), VisitLimit(maxVisits), heuristicType, stats,
+                  startNode=graph.nodeClass(graph.start, None), testOnGeneration=True)
+
+
+def depthFirst(graph, currentNode, depth, heuristicType=None, stats=None):
+    """Depth first search that yields the scope nodes found exactly depth - 1 moves below currentNode"""
+    return search(graph, LifoFrontier(), heuristicType=heuristicType, stats=stats, startNode=currentNode,
+                  depthLimit=depth - 1, exactDepth=True)
+
+
+def iterativeDepthFirst(graph, maxDepth, heuristicType=None, stats=None):
+    """Depth first searches with the depth limits 1 .. maxDepth, so the solutions are found in the order of their length"""
+    stats = stats if stats is not None else SearchStats()
+    for d in range(1, maxDepth + 1):
+        yield from depthFirst(graph, graph.nodeClass(graph.start, None), d, heuristicType, stats)
+
+
+def uniformCostSearch(graph, heuristicType=None, stats=None):
+    """Uniform cost search over the traversal tree, the solutions are found in the order of their cost.
+    Nodes of equal cost are expanded in insertion order
+    """
+    return search(graph, HeapFrontier("cost"), heuristicType=heuristicType, stats=stats,
+                  startNode=graph.nodeClass(graph.start, None, 0))
+
+
+def cheapestContinuation(graph, spurNode, blockedStates, canStop, maxCost, heuristicType, stats):
+    """The cheapest path that continues the path of spurNode to a scope state, without going through the states
+    already on it and without the moves from spurNode to blockedStates (a Dijkstra search, see SpurSearch)
+
+    Args:
+        canStop (bool): Whether the path can end at spurNode, if it is a scope node
+        maxCost (float): The paths that cost more are not searched
+
+    Returns:
+        Node: The scope node at the end of the path, or None if there is no such path
+    """
+    spurStats = SearchStats()
+    solutions = search(graph, HeapFrontier("cost"), SpurSearch(spurNode, blockedStates, maxCost), heuristicType,
+                       spurStats, startNode=spurNode)
+    node = next((solution.node for solution in solutions if canStop or solution.node is not spurNode), None)
+
+    stats.expandedNodes += spurStats.expandedNodes
+    stats.generatedNodes += spurStats.generatedNodes
+    stats.duplicatesPruned += spurStats.duplicatesPruned
+    if spurStats.maxFrontierSize > stats.maxFrontierSize:
+        stats.maxFrontierSize = spurStats.maxFrontierSize
+    return node
+
+
+def kBestUniformCostSearch(graph, k, heuristicType=None, stats=None):
+    """The k cheapest paths to the scope states, with Yen's algorithm: the same solutions as the first k of
+    uniformCostSearch (the paths don't go through the same state twice), without its exponential queue.
+
+    The cheapest path is found with Dijkstra. Then, for every path found, each of its nodes (the spur node) gets
+    the cheapest path that follows it up to the spur node and then leaves it: with a Dijkstra from the spur node that
+    avoids the states before it and the moves taken by the paths found earlier with the same beginning. These are the
+    candidates for the next path, which is the cheapest of them. The paths can also go through a scope state and
+    end at another one, like in uniformCostSearch.
+
+    Two shortcuts keep the number of Dijkstra searches down: a path leaves the nodes before its spur node only in
+    paths that were already candidates, so only its nodes from the spur node on are spur nodes (Lawler), and once
+    there are enough candidates for the solutions still needed, the searches don't go past the cost of the last
+    of them.
+    """
+    stats = stats if stats is not None else SearchStats()
+    insertionIndex = itertools.count()
+    node = cheapestContinuation(graph, graph.nodeClass(graph.start, None, 0), set(), True, math.inf, heuristicType,
+                                stats)
+    firstSpur = 0
+    # the states of the paths found so far, and a binary heap of (cost, insertionIndex, node, spur index)
+    # for the candidates
+    found = []
+    foundKeys = set()
+    candidates = []
+    candidateKeys = set()
+
+    while node is not None and len(found) < k:
+        yield makeSolution(node, stats)
+        path = node.getPath()
+        states = tuple(n.info for n in path)
+        found.append(states)
+        foundKeys.add(states)
+        if len(found) == k:
+            return
+
+        for i in range(firstSpur, len(path)):
+            root = states[:i + 1]
+            blockedStates = {p[i + 1] for p in found if len(p) > i + 1 and p[:i + 1] == root}
+            needed = k - len(found)
+            maxCost = heapq.nsmallest(needed, candidates)[-1][0] if len(candidates) >= needed else math.inf
+            candidate = cheapestContinuation(graph, path[i], blockedStates, root not in foundKeys, maxCost,
+                                             heuristicType, stats)
+            if candidate is None:
+                continue
+            key = tuple(n.info for n in candidate.getPath())
+            if key not in candidateKeys:
+                candidateKeys.add(key)
+                heapq.heappush(candidates, (candidate.cost, next(insertionIndex), candidate, i))
+
+        if not candidates:
+            return
+        _, _, node, firstSpur = heapq.heappop(candidates)
+
+
+def treeAStar(graph, heuristicType, stats=None):
+    """A* over the traversal tree, without a closed set: every path is kept, so the solutions are found
+    in the order of their approximate cost (like in Lab3_8puzzle). Nodes of equal approximate cost are expanded
+    in insertion order
+    """
+    # the heuristics of the successors may be updated from the heuristic of their parent,
+    # so the start node gets the exact value (search does that when it is given a heuristic type)
+    return search(graph, HeapFrontier("pathCost"), heuristicType=heuristicType, stats=stats)
+
+
+def aStar(graph, heuristicType, stats=None):
+    """A* with an open queue and a closed set (like in Lab2_AStar_Blocks): each state is expanded again only if a
+    path with a better approximate cost is found. Nodes of equal approximate cost are expanded deeper first and then
+    most recently inserted first. After a solution the search goes on towards the other scope states
+    """
+    return search(graph, HeapFrontier("pathCost", deeperFirst=True), ClosedSet(), heuristicType, stats,
+                  expandScopes=False)
+
+
+def printSolutions(solutions, numOfSolutions, printCost=False, pause=True):
+    """Prints the first numOfSolutions solutions of a search, the way the lab scripts do
+
+    Args:
+        solutions (generator of Solution): One of the searches of this module
+        numOfSolutions (int)
+        printCost (bool): Whether to print the cost of each solution
+        pause (bool): Whether to wait for a key press after each solution
+
+    Returns:
+        int: The number of solutions that are still needed (0 if numOfSolutions were found)
+    """
+    if numOfSolutions <= 0:
+        return numOfSolutions
+    for solution in solutions:
+        print("Solution!")
+        solution.node.printPath(printLength=True, printCost=printCost)
+        print("================================\n")
+        numOfSolutions -= 1
+        if pause:
+            waitForKey()
+
+        if numOfSolutions == 0:
+            break
+    return numOfSolutions
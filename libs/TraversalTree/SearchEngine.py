@@ -0,0 +1,305 @@
+"""The search loop shared by all the searches of libs.TraversalTree.Search.
+
+A search is the same loop with different parts plugged in:
+    - a frontier, which decides the order in which the nodes are expanded: FifoFrontier (breadth first),
+      LifoFrontier (depth first) or HeapFrontier (the minimum cost g or approximate cost f first)
+    - a duplicate policy, which decides what happens to the nodes of states that were already reached:
+      TreeSearch (nothing, every path is kept), VisitLimit and ExpansionLimit (each state is added / expanded
+      a bounded number of times), SpurSearch (Dijkstra without some moves, for Yen's algorithm) or ClosedSet
+      (the hashed open and closed sets of A*, with reopening)
+    - when the scope test is done (when a node is expanded or when it is generated), whether the scope nodes
+      are expanded too, and an optional depth limit
+
+The graph is used only through the interface of libs.TraversalTree.Graph: start, scopes, nodeClass, testScope,
+generateSuccessors and calcHeuristic. For example, A* is:
+
+    search(graph, HeapFrontier("pathCost", deeperFirst=True), ClosedSet(), heuristicType, expandScopes=False)
+"""
+import collections
+import heapq
+import itertools
+import math
+import operator
+
+from libs.TraversalTree.SearchStats import SearchStats
+from libs.TraversalTree.Solution import Solution
+
+
+def makeSolution(node, stats):
+    stats.solutionsFound += 1
+    return Solution(node, stats.copy())
+
+
+def expand(graph, currentNode, heuristicType, stats):
+    succ = graph.generateSuccessors(currentNode, heuristicType)
+    stats.expandedNodes += 1
+    stats.generatedNodes += len(succ)
+    return succ
+
+
+class FifoFrontier:
+    """The nodes are expanded in the order in which they were added (breadth first)"""
+
+    def __init__(self):
+        self.queue = collections.deque()
+
+    def push(self, node, depth):
+        self.queue.append((node, depth))
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+
+class LifoFrontier:
+    """The last added node is expanded first (depth first). The successors of a node are added in reverse order,
+    so they are expanded in the order in which they were generated (like a recursive depth first search)
+    """
+
+    reverseSuccessors = True
+
+    def __init__(self):
+        self.stack = []
+
+    def push(self, node, depth):
+        self.stack.append((node, depth))
+
+    def pop(self):
+        return self.stack.pop()
+
+    def __len__(self):
+        return len(self.stack)
+
+
+class HeapFrontier:
+    """A binary heap: the node with the minimum value of the given attribute is expanded first.
+    Nodes of equal value are expanded in insertion order, or if deeperFirst is True, the node with the larger cost
+    (i.e. the one further from the start) and then the most recently inserted node are expanded first
+
+    Args:
+        attribute (str): cost (uniform cost search) or pathCost (A*)
+        deeperFirst (bool)
+    """
+
+    def __init__(self, attribute="cost", deeperFirst=False):
+        self.key = operator.attrgetter(attribute)
+        self.deeperFirst = deeperFirst
+        self.heap = []
+        self.insertionIndex = itertools.count()
+
+    def push(self, node, depth):
+        if self.deeperFirst:
+            heapq.heappush(self.heap, (self.key(node), -node.cost, -next(self.insertionIndex), node, depth))
+        else:
+            heapq.heappush(self.heap, (self.key(node), next(self.insertionIndex), node, depth))
+
+    def pop(self):
+        entry = heapq.heappop(self.heap)
+        return entry[-2], entry[-1]
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class TreeSearch:
+    """No duplicate detection: a state is added again for every path that reaches it"""
+
+    def start(self, node):
+        pass
+
+    def accept(self, node, stats):
+        """Called when a node is popped from the frontier, returns False if it must be skipped"""
+        return True
+
+    def admit(self, node, stats):
+        """Called when a node is generated, returns False if it must be discarded"""
+        return True
+
+    def frontierSize(self, frontier):
+        return len(frontier)
+
+
+class VisitLimit(TreeSearch):
+    """Each state is added to the frontier at most maxVisits times"""
+
+    def __init__(self, maxVisits=1):
+        self.maxVisits = maxVisits
+        self.visits = {}
+
+    def start(self, node):
+        self.visits[node.info] = 1
+
+    def admit(self, node, stats):
+        info = node.info
+        count = self.visits.get(info, 0)
+        if count >= self.maxVisits:
+            stats.duplicatesPruned += 1
+            return False
+        self.visits[info] = count + 1
+        return True
+
+
+class ExpansionLimit(TreeSearch):
+    """Each state is expanded at most maxExpansions times: with a heap on the cost and maxExpansions = 1,
+    this is Dijkstra's algorithm"""
+
+    def __init__(self, maxExpansions=1):
+        self.maxExpansions = maxExpansions
+        self.pops = {}
+
+    def accept(self, node, stats):
+        info = node.info
+        count = self.pops.get(info, 0)
+        if count >= self.maxExpansions:
+            stats.duplicatesPruned += 1
+            return False
+        self.pops[info] = count + 1
+        return True
+
+    def admit(self, node, stats):
+        if self.pops.get(node.info, 0) < self.maxExpansions:
+            return True
+        stats.duplicatesPruned += 1
+        return False
+
+
+class SpurSearch(ExpansionLimit):
+    """Dijkstra from a spur node of Yen's algorithm (see Search.kBestUniformCostSearch): each state is expanded once
+    and the moves from the spur node to the given states are not taken (the states on the path of the spur node
+    are already excluded by the graph)
+
+    Args:
+        spurNode (Node): The start node of the search
+        blockedStates (set): The states that can't follow the spur node
+        maxCost (float): The nodes that cost more are not expanded
+    """
+
+    def __init__(self, spurNode, blockedStates, maxCost=math.inf):
+        super().__init__(1)
+        self.spurNode = spurNode
+        self.blockedStates = blockedStates
+        self.maxCost = maxCost
+
+    def accept(self, node, stats):
+        # with a heap on the cost, all the nodes left in the frontier cost more too, so they are only popped
+        if node.cost > self.maxCost:
+            return False
+        return super().accept(node, stats)
+
+    def admit(self, node, stats):
+        if node.parent is self.spurNode and node.info in self.blockedStates:
+            return False
+        return super().admit(node, stats)
+
+
+class ClosedSet(TreeSearch):
+    """The hashed open and closed sets of A*: each state has a single node in the frontier (the one with the best
+    approximate cost) and a closed state is reopened only if a path with a better approximate cost is found.
+    The nodes that were replaced by a better one are not removed from the frontier, they are skipped when popped
+
+    Args:
+        reopen (bool): If False, the closed states are never expanded again (right with a consistent heuristic)
+    """
+
+    def __init__(self, reopen=True):
+        self.reopen = reopen
+        self.openNodes = {}
+        self.closed = {}
+
+    def start(self, node):
+        self.openNodes[node.info] = node
+
+    def accept(self, node, stats):
+        # the info is read once, since compact nodes rebuild it on every access
+        info = node.info
+        if self.openNodes.get(info) is not node:
+            return False
+        del self.openNodes[info]
+        self.closed[info] = node
+        return True
+
+    def admit(self, node, stats):
+        info = node.info
+        el = self.openNodes.get(info)
+        if el is not None:
+            # the node already in the frontier is replaced only by one with a better approximation
+            if node.pathCost >= el.pathCost:
+                stats.duplicatesPruned += 1
+                return False
+        else:
+            el = self.closed.get(info)
+            if el is not None:
+                if not self.reopen or node.pathCost >= el.pathCost:
+                    stats.duplicatesPruned += 1
+                    return False
+                del self.closed[info]
+                stats.reopenedNodes += 1
+
+        self.openNodes[info] = node
+        return True
+
+    def frontierSize(self, frontier):
+        # the frontier is the set of states in the open set, without the outdated heap entries
+        return len(self.openNodes)
+
+
+def search(graph, frontier, duplicates=None, heuristicType=None, stats=None, startNode=None,
+           testOnGeneration=False, expandScopes=True, depthLimit=None, exactDepth=False):
+    """The search loop, a generator that yields a Solution for every scope node it reaches
+
+    Args:
+        graph (Graph)
+        frontier (FifoFrontier, LifoFrontier or HeapFrontier): A new, empty frontier
+        duplicates (TreeSearch, VisitLimit, ExpansionLimit or ClosedSet): A new duplicate policy, TreeSearch if not given
+        heuristicType (String): Passed to generateSuccessors, the start node gets its heuristic if given
+        stats (SearchStats)
+        startNode (Node): The node the search starts from, a new node of graph.start if not given
+        testOnGeneration (bool): Whether the scope test is done when a node is generated instead of when it is expanded
+        expandScopes (bool): Whether the scope nodes are expanded, so that the search goes on through them
+        depthLimit (int): The nodes that are depthLimit moves below the start node are not expanded
+        exactDepth (bool): Whether only the nodes that are exactly depthLimit moves below the start node are tested
+    """
+    stats = stats if stats is not None else SearchStats()
+    duplicates = duplicates if duplicates is not None else TreeSearch()
+    if startNode is None:
+        heuristic = graph.calcHeuristic(graph.start, heuristicType) if heuristicType is not None else 1
+        startNode = graph.nodeClass(graph.start, None, 0, heuristic)
+    reverseSuccessors = getattr(frontier, "reverseSuccessors", False)
+
+    # the methods called for every node are looked up once
+    push, pop = frontier.push, frontier.pop
+    accept, admit = duplicates.accept, duplicates.admit
+    testScope = graph.testScope
+
+    duplicates.start(startNode)
+    if testOnGeneration and testScope(startNode):
+        yield makeSolution(startNode, stats)
+    push(startNode, 0)
+
+    while len(frontier) > 0:
+        currentNode, depth = pop()
+        if not accept(currentNode, stats):
+            continue
+
+        if not testOnGeneration and (not exactDepth or depth == depthLimit) and testScope(currentNode):
+            yield makeSolution(currentNode, stats)
+            if not expandScopes:
+                continue
+
+        if depthLimit is not None and depth >= depthLimit:
+            continue
+        succ = expand(graph, currentNode, heuristicType, stats)
+        if reverseSuccessors:
+            succ = reversed(succ)
+        for s in succ:
+            if not admit(s, stats):
+                continue
+            if testOnGeneration and testScope(s):
+                yield makeSolution(s, stats)
+            push(s, depth + 1)
+
+        size = duplicates.frontierSize(frontier)
+        if size > stats.maxFrontierSize:
+            stats.maxFrontierSize = size
@@ -0,0 +1,30 @@
+class SearchStats:
+    """The counters of a search, updated while the search runs
+
+    Attributes:
+        expandedNodes (int): The number of nodes whose successors were generated
+        generatedNodes (int): The number of successors generated
+        duplicatesPruned (int): The number of successors dropped because their state was already known with a path that is at least as good
+        reopenedNodes (int): The number of states taken out of the closed set because a cheaper path to them was found
+        maxFrontierSize (int): The largest size of the queue of nodes waiting to be expanded
+        solutionsFound (int): The number of solutions found so far
+    """
+
+    __slots__ = ('expandedNodes', 'generatedNodes', 'duplicatesPruned', 'reopenedNodes', 'maxFrontierSize', 'solutionsFound')
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def copy(self):
+        """Returns a snapshot of the counters, which is not changed when the search continues"""
+        stats = SearchStats()
+        for name in self.__slots__:
+            setattr(stats, name, getattr(self, name))
+        return stats
+
+    def asDict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return "SearchStats(" + ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__) + ")"
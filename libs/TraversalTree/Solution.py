@@ -0,0 +1,29 @@
+class Solution:
+    """A solution yielded by one of the searches in libs.TraversalTree.Search
+
+    Attributes:
+        node (Node): The scope node, its ancestors being the path from the start node
+        stats (SearchStats): The counters of the search at the moment the solution was found
+    """
+
+    __slots__ = ('node', 'stats')
+
+    def __init__(self, node, stats):
+        self.node = node
+        self.stats = stats
+
+    @property
+    def path(self):
+        """[Node]: The path from the start node to the scope node"""
+        return self.node.getPath()
+
+    @property
+    def cost(self):
+        return self.node.cost
+
+    @property
+    def expandedNodes(self):
+        return self.stats.expandedNodes
+
+    def __repr__(self):
+        return f"Solution(cost={self.cost}, expandedNodes={self.expandedNodes})"
@@ -0,0 +1,79 @@
+class State:
+    """An immutable and hashable representation of a node's info, stored as a tuple of tuples
+
+    Both the block stacks and the rows of a sliding puzzle board are a list of rows, so they can share
+    the same representation. Since the hash is computed only once, states can be used as set members
+    and dictionary keys in O(1), and two different states are usually told apart by their hashes alone.
+
+    The class also behaves like the old list of lists (indexing, iteration, len, repr), so the code that
+    only reads the info (e.g. the __str__ renderers of the nodes) keeps working unchanged.
+
+    Attributes:
+        rows (tuple): The rows of the state, each of them a tuple
+        hash (int): The cached hash of the rows
+    """
+
+    __slots__ = ('rows', 'hash')
+
+    def __init__(self, rows):
+        """
+        Args:
+            rows (iterable): The rows of the state, each of them an iterable (e.g. a list of lists)
+        """
+        self.rows = tuple(tuple(row) for row in rows)
+        self.hash = hash(self.rows)
+
+    @classmethod
+    def fromTuples(cls, rows):
+        """Builds a state from rows that are already a tuple of tuples, without copying them
+
+        Args:
+            rows (tuple): A tuple of tuples
+
+        Returns:
+            State
+        """
+        state = cls.__new__(cls)
+        state.rows = rows
+        state.hash = hash(rows)
+        return state
+
+    def toLists(self):
+        """Returns a mutable copy of the state as a list of lists"""
+        return [list(row) for row in self.rows]
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, State):
+            return NotImplemented
+        return self.hash == other.hash and self.rows == other.rows
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index]
+
+    def __repr__(self):
+        return repr(self.toLists())
+
+    def __getstate__(self):
+        return self.rows
+
+    def __setstate__(self, rows):
+        # string hashes differ between interpreters, so the hash is recomputed after unpickling
+        self.rows = rows
+        self.hash = hash(rows)